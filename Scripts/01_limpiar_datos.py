@@ -10,6 +10,8 @@ import os
 import unicodedata
 import platform
 
+import corpus_tokenizado
+
 # Función para emitir sonidos de notificación (solo en Windows)
 def reproducir_blip(tipo="ok"):
     if platform.system() == "Windows":
@@ -125,50 +127,72 @@ tipo_dia_dict = {
     3: "Día de semana", 4: "Día de semana", 5: "Fin de semana", 6: "Fin de semana"
 }
 
+# Limpia y enriquece un DataFrame ya cargado (sin leer ni escribir archivos)
+# Reutilizado por el procesamiento por lotes (07_procesar_lote.py)
+def limpiar_dataframe(df):
+    df.columns = [col.strip().lower() for col in df.columns]
+
+    if 'post' not in df.columns:
+        raise ValueError("❌ La columna 'post' no está presente en el archivo.")
+
+    # Limpieza de texto
+    df['post_limpio'] = df['post'].apply(limpiar_texto_avanzado)
+
+    # Enriquecimiento por fecha de publicación
+    if 'published' in df.columns:
+        df['published'] = pd.to_datetime(df['published'], errors='coerce')
+        df['estacion'] = df['published'].dt.month.map(estaciones_dict).fillna("Desconocido")
+        df['temporada_comercial'] = df['published'].dt.month.map(temporadas_dict).fillna("Sin campaña")
+        df['día_semana'] = df['published'].dt.dayofweek.map(dias_dict_con_numero)
+        df['tipo_dia'] = df['published'].dt.dayofweek.map(tipo_dia_dict)
+        df['hora'] = df['published'].dt.strftime('%H:%M:%S')
+        df['hora_12h'] = df['published'].dt.strftime('%I %p').str.lstrip('0')
+        df['rango_horario'] = df['published'].dt.hour.apply(obtener_rango_horario)
+        print("✅ Columna 'published' procesada, desglosada y enriquecida.")
+    else:
+        print("⚠️  No se encontró la columna 'published' en el DataFrame.")
+
+    # Eliminación de columnas innecesarias si están presentes
+    columnas_a_eliminar = [col for col in ['post', 'link', 'id', 'año', 'mes_num', 'fecha'] if col in df.columns]
+    df.drop(columns=columnas_a_eliminar, inplace=True)
+
+    return df
+
+# Guarda el dataset limpio con nombre no duplicado dentro del directorio indicado
+def exportar_dataset_limpio(df, directorio_salida):
+    nombre_base = "1_Dataset_Limpio"
+    contador = 1
+    nombre_salida = os.path.join(directorio_salida, f"{nombre_base}.xlsx")
+
+    while os.path.exists(nombre_salida):
+        nombre_salida = os.path.join(directorio_salida, f"{nombre_base}_{contador}.xlsx")
+        contador += 1
+
+    df.to_excel(nombre_salida, index=False)
+    return nombre_salida
+
+# Tokeniza 'post_limpio' una sola vez y guarda el corpus compartido (vocabulario + ids int32) junto al dataset
+def exportar_corpus_tokenizado(df, directorio_salida):
+    corpus = corpus_tokenizado.tokenizar(df['post_limpio'].fillna(''))
+    corpus_tokenizado.guardar_corpus(corpus, directorio_salida)
+    return corpus
+
 # Función completa para cargar, limpiar y enriquecer el archivo
-def procesar_archivo_avanzado(ruta_archivo):
+# Si 'generar_corpus' es True, también guarda el corpus tokenizado para las etapas 02 y 04
+def procesar_archivo_avanzado(ruta_archivo, generar_corpus=False):
     try:
         if not os.path.exists(ruta_archivo):
             raise FileNotFoundError("❌ Archivo no encontrado.")
 
         df = pd.read_excel(ruta_archivo)
-        df.columns = [col.strip().lower() for col in df.columns]
-
-        if 'post' not in df.columns:
-            raise ValueError("❌ La columna 'post' no está presente en el archivo.")
-
-        # Limpieza de texto
-        df['post_limpio'] = df['post'].apply(limpiar_texto_avanzado)
-
-        # Enriquecimiento por fecha de publicación
-        if 'published' in df.columns:
-            df['published'] = pd.to_datetime(df['published'], errors='coerce')
-            df['estacion'] = df['published'].dt.month.map(estaciones_dict).fillna("Desconocido")
-            df['temporada_comercial'] = df['published'].dt.month.map(temporadas_dict).fillna("Sin campaña")
-            df['día_semana'] = df['published'].dt.dayofweek.map(dias_dict_con_numero)
-            df['tipo_dia'] = df['published'].dt.dayofweek.map(tipo_dia_dict)
-            df['hora'] = df['published'].dt.strftime('%H:%M:%S')
-            df['hora_12h'] = df['published'].dt.strftime('%I %p').str.lstrip('0')
-            df['rango_horario'] = df['published'].dt.hour.apply(obtener_rango_horario)
-            print("✅ Columna 'published' procesada, desglosada y enriquecida.")
-        else:
-            print("⚠️  No se encontró la columna 'published' en el DataFrame.")
-
-        # Eliminación de columnas innecesarias si están presentes
-        columnas_a_eliminar = [col for col in ['post', 'link', 'id', 'año', 'mes_num', 'fecha'] if col in df.columns]
-        df.drop(columns=columnas_a_eliminar, inplace=True)
+        df = limpiar_dataframe(df)
 
         # Guardar con nombre no duplicado
-        directorio_salida = os.path.dirname(ruta_archivo)
-        nombre_base = "1_Dataset_Limpio"
-        contador = 1
-        nombre_salida = os.path.join(directorio_salida, f"{nombre_base}.xlsx")
-
-        while os.path.exists(nombre_salida):
-            nombre_salida = os.path.join(directorio_salida, f"{nombre_base}_{contador}.xlsx")
-            contador += 1
+        nombre_salida = exportar_dataset_limpio(df, os.path.dirname(ruta_archivo))
 
-        df.to_excel(nombre_salida, index=False)
+        if generar_corpus:
+            corpus = exportar_corpus_tokenizado(df, os.path.dirname(ruta_archivo))
+            print(f"🧩 Corpus tokenizado: {len(corpus.tokens)} tokens, {len(corpus.vocabulario)} palabras distintas.")
 
         print("\n✅ Archivo exportado exitosamente:")
         print(f"{nombre_salida}")
@@ -186,5 +210,6 @@ if __name__ == "__main__":
     entrada_usuario = input("Ingrese la ruta del archivo Excel (.xlsx): ")
     reproducir_blip("ok")
     ruta = formatear_ruta(entrada_usuario)
-    procesar_archivo_avanzado(ruta)
+    generar_corpus = input("🧩 ¿Generar también el corpus tokenizado para las etapas 02 y 04? (s/n): ").strip().lower() == "s"
+    procesar_archivo_avanzado(ruta, generar_corpus)
     input("\nPresione ENTER para salir...")
\ No newline at end of file
@@ -1,4 +1,9 @@
+# Hilos de OpenMP/BLAS para scikit-learn (PIPELINE_HILOS); se fija antes de importar numpy
+import presupuesto_hilos
+presupuesto_hilos.configurar_entorno()
+
 import pandas as pd
+import numpy as np
 import nltk
 import platform
 import os
@@ -6,6 +11,12 @@ import json
 from collections import Counter
 from nltk.corpus import stopwords
 from nltk.tokenize import RegexpTokenizer
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+
+import corpus_tokenizado
+
+# Aplica el presupuesto de hilos a los pools OpenMP/BLAS ya cargados
+presupuesto_hilos.limitar_librerias()
 
 # -----------------------------------
 # Función para emitir un sonido (solo en Windows)
@@ -36,6 +47,12 @@ def descargar_recursos_nltk():
 
 descargar_recursos_nltk()
 
+# Filas de la matriz documento-término que se procesan por bloque al extraer keywords por post
+TAM_BLOQUE_FILAS = 10000
+
+# Mismo criterio que 'filtrar_tokens': palabras (\w+) de 3 o más caracteres
+PATRON_TOKENS = r'(?u)\b\w\w\w+\b'
+
 # -----------------------------------
 # Normaliza y limpia la ruta ingresada por el usuario
 # Elimina comillas, espacios extra y reemplaza backslashes por slashes
@@ -63,6 +80,14 @@ def cargar_archivo(ruta):
         print(f"❌ Error al cargar el archivo: {e}")
         return None
 
+# -----------------------------------
+# Tokeniza un texto y descarta stopwords y palabras muy cortas
+# Es el mismo criterio usado en todo el conteo de keywords
+# -----------------------------------
+def filtrar_tokens(texto, stopwords_es, tokenizer):
+    tokens = tokenizer.tokenize(texto.lower())
+    return [w for w in tokens if w not in stopwords_es and len(w) > 2]
+
 # -----------------------------------
 # Procesa todos los textos de la columna 'post_limpio' y extrae las palabras más frecuentes
 # Elimina las palabras vacías (stopwords) y filtra palabras muy cortas
@@ -76,13 +101,95 @@ def contar_palabras(df, top_n=15):
     textos = df['post_limpio'].tolist()
 
     for texto in textos:
-        tokens = tokenizer.tokenize(texto.lower())
-        tokens_filtrados = [w for w in tokens if w not in stopwords_es and len(w) > 2]
-        palabras.extend(tokens_filtrados)
+        palabras.extend(filtrar_tokens(texto, stopwords_es, tokenizer))
 
     contador = Counter(palabras)
     return contador.most_common(top_n)
 
+# -----------------------------------
+# Igual que 'contar_palabras', pero sobre el corpus tokenizado de la etapa 01 (ids de token, sin procesar strings)
+# -----------------------------------
+def contar_palabras_corpus(corpus, top_n=15):
+    mascara = corpus.mascara_keywords(set(stopwords.words('spanish')))
+    conteos, primera_aparicion = corpus_tokenizado.frecuencias_keywords(corpus, mascara)
+    return [(corpus.vocabulario[i], int(conteos[i])) for i in corpus_tokenizado.top_ids(conteos, primera_aparicion, top_n)]
+
+# -----------------------------------
+# Construye la matriz documento-término (una sola vez) con el mismo filtro de stopwords y longitud
+# Si 'ponderar_tfidf' es True, los conteos se reemplazan por pesos TF-IDF
+# Devuelve la matriz dispersa (CSR) y el vocabulario como arreglo de strings
+# Si se pasa el 'corpus' tokenizado de la etapa 01, la matriz se arma desde los ids sin procesar 'textos'
+# -----------------------------------
+def construir_matriz_terminos(textos, ponderar_tfidf=False, corpus=None):
+    if corpus is not None:
+        mascara = corpus.mascara_keywords(set(stopwords.words('spanish')))
+        matriz, vocabulario = corpus_tokenizado.matriz_terminos(corpus, mascara)
+        if ponderar_tfidf:
+            matriz = TfidfTransformer().fit_transform(matriz).astype(np.float32).tocsr()
+        return matriz, vocabulario
+
+    parametros = dict(lowercase=True, token_pattern=PATRON_TOKENS,
+                      stop_words=list(stopwords.words('spanish')), dtype=np.float32)
+    vectorizador = TfidfVectorizer(**parametros) if ponderar_tfidf else CountVectorizer(**parametros)
+    matriz = vectorizador.fit_transform(textos).tocsr()
+    return matriz, vectorizador.get_feature_names_out()
+
+# -----------------------------------
+# Obtiene los top_k términos de cada fila de una matriz CSR sin recorrer las filas en Python
+# Cada bloque de filas se expande a una matriz densa de (filas x máximo de términos por fila)
+# con -inf como relleno, y se aplica argpartition fila por fila de forma vectorizada
+# Devuelve (ids de término, puntajes); las posiciones vacías tienen id -1
+# -----------------------------------
+def top_terminos_por_fila(matriz, top_k=5, tam_bloque=TAM_BLOQUE_FILAS):
+    n_filas = matriz.shape[0]
+    ids = np.full((n_filas, top_k), -1, dtype=np.int64)
+    puntajes = np.zeros((n_filas, top_k), dtype=np.float32)
+
+    for inicio in range(0, n_filas, tam_bloque):
+        bloque = matriz[inicio:inicio + tam_bloque]
+        terminos_por_fila = np.diff(bloque.indptr)
+        max_terminos = int(terminos_por_fila.max()) if bloque.nnz else 0
+        if max_terminos == 0:
+            continue
+
+        # Posición de cada valor no nulo dentro de su fila
+        filas = np.repeat(np.arange(bloque.shape[0]), terminos_por_fila)
+        columnas = np.arange(bloque.nnz) - np.repeat(bloque.indptr[:-1], terminos_por_fila)
+
+        valores = np.full((bloque.shape[0], max_terminos), -np.inf, dtype=np.float32)
+        valores[filas, columnas] = bloque.data
+        terminos = np.full((bloque.shape[0], max_terminos), -1, dtype=np.int32)
+        terminos[filas, columnas] = bloque.indices
+
+        k = min(top_k, max_terminos)
+        seleccion = np.argpartition(-valores, k - 1, axis=1)[:, :k]
+        valores_sel = np.take_along_axis(valores, seleccion, axis=1)
+        orden = np.argsort(-valores_sel, axis=1, kind='stable')
+        seleccion = np.take_along_axis(seleccion, orden, axis=1)
+        valores_sel = np.take_along_axis(valores_sel, orden, axis=1)
+        terminos_sel = np.take_along_axis(terminos, seleccion, axis=1)
+
+        validos = np.isfinite(valores_sel)
+        fin = inicio + bloque.shape[0]
+        ids[inicio:fin, :k] = np.where(validos, terminos_sel, -1)
+        puntajes[inicio:fin, :k] = np.where(validos, valores_sel, 0)
+
+    return ids, puntajes
+
+# -----------------------------------
+# Extrae las top_k keywords de cada post (columna 'post_limpio')
+# Devuelve una Serie con las keywords de cada post unidas por ", " (lista compacta para Power BI)
+# -----------------------------------
+def extraer_keywords_por_post(df, top_k=5, ponderar_tfidf=False, corpus=None):
+    textos = df['post_limpio'].fillna('').tolist() if corpus is None else None
+    matriz, vocabulario = construir_matriz_terminos(textos, ponderar_tfidf, corpus)
+    ids, _ = top_terminos_por_fila(matriz, top_k)
+
+    # Se agrega un string vacío al final del vocabulario para representar las posiciones sin término (-1)
+    vocabulario = np.append(vocabulario, '')
+    palabras = vocabulario[ids]
+    return pd.Series([", ".join(p for p in fila if p) for fila in palabras.tolist()], index=df.index, name='keywords_post')
+
 # -----------------------------------
 # Exporta los resultados del análisis a un archivo (Excel, CSV o JSON)
 # El nombre del archivo se adapta automáticamente para evitar sobreescribir
@@ -99,8 +206,11 @@ def exportar_resultados(resultados, ruta_origen, formato="excel"):
         nombre_salida = os.path.join(carpeta_destino, f"{nombre_base}_{contador}{extension}")
         contador += 1
 
-    # Convierte el resultado a un DataFrame
-    df_export = pd.DataFrame(resultados, columns=["Keyword", "Frecuencia"])
+    # Convierte el resultado a un DataFrame (o lo usa directamente si ya lo es, como en el modo por post)
+    if isinstance(resultados, pd.DataFrame):
+        df_export = resultados
+    else:
+        df_export = pd.DataFrame(resultados, columns=["Keyword", "Frecuencia"])
 
     # Exporta al formato deseado
     if formato == "excel":
@@ -108,8 +218,11 @@ def exportar_resultados(resultados, ruta_origen, formato="excel"):
     elif formato == "csv":
         df_export.to_csv(nombre_salida, index=False)
     elif formato == "json":
-        with open(nombre_salida, "w", encoding="utf-8") as f:
-            json.dump(dict(resultados), f, ensure_ascii=False, indent=2)
+        if isinstance(resultados, pd.DataFrame):
+            df_export.to_json(nombre_salida, orient="records", force_ascii=False, indent=2)
+        else:
+            with open(nombre_salida, "w", encoding="utf-8") as f:
+                json.dump(dict(resultados), f, ensure_ascii=False, indent=2)
 
     return nombre_salida
 
@@ -122,9 +235,30 @@ if __name__ == "__main__":
     ruta = formatear_ruta(ruta_input)
 
     df = cargar_archivo(ruta)
-    if df is not None:
+
+    # Si la etapa 01 generó el corpus tokenizado de este dataset, se trabaja directamente sobre los ids de token
+    corpus = corpus_tokenizado.cargar_corpus_alineado(os.path.dirname(ruta) or ".", df['post_limpio']) if df is not None else None
+    if corpus is not None:
+        print("🧩 Usando el corpus tokenizado de la etapa 01.")
+
+    if df is not None and input("\n🏷️ ¿Qué deseas extraer? 1. Top global  2. Top keywords de cada post (1-2): ").strip() == "2":
+        top_k = input("🔢 ¿Cuántas keywords por post? (ENTER = 5): ").strip()
+        top_k = int(top_k) if top_k.isdigit() and int(top_k) > 0 else 5
+        tfidf = input("⚖️ ¿Ponderar con TF-IDF? (s/n): ").strip().lower() == "s"
+
+        print("\n✅ Archivo cargado correctamente. Extrayendo keywords por post...\n")
+        df['keywords_post'] = extraer_keywords_por_post(df, top_k=top_k, ponderar_tfidf=tfidf, corpus=corpus)
+        print(df[['post_limpio', 'keywords_post']].head(10))
+
+        salida = exportar_resultados(df, ruta, "excel")
+        print(f"\n✅ Resultados exportados exitosamente a:\n{salida}")
+        reproducir_blip("ok")
+    elif df is not None:
         print("\n✅ Archivo cargado correctamente. Procesando texto...\n")
-        resultados = contar_palabras(df, top_n=50)
+        if corpus is not None:
+            resultados = contar_palabras_corpus(corpus, top_n=50)
+        else:
+            resultados = contar_palabras(df, top_n=50)
 
         print("📤 ¿Cómo deseas visualizar los resultados?")
         print("1. Consola")
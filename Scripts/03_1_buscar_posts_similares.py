@@ -0,0 +1,186 @@
+# -----------------------------------------------
+# 03_1_buscar_posts_similares.py
+# Búsqueda exacta de publicaciones semánticamente similares sobre los embeddings guardados por el script 03
+# Uso: Ejecutar después de 03_agrupar_cluster.py (requiere 3_Embeddings.npy y 3_Embeddings_meta.csv)
+# -----------------------------------------------
+
+# Hilos de BLAS para el producto de similitud y de torch para vectorizar consultas (PIPELINE_HILOS)
+import presupuesto_hilos
+presupuesto_hilos.configurar_entorno()
+
+import os
+import platform
+import time
+
+import numpy as np
+import pandas as pd
+
+import etapas
+
+limpieza = etapas.cargar_etapa("01_limpiar_datos")
+agrupamiento = etapas.cargar_etapa("03_agrupar_cluster")
+
+# Número de filas de la matriz que se procesan por bloque (acota la memoria usada en cada producto)
+TAM_BLOQUE = 65536
+
+# Función para emitir sonidos en Windows como retroalimentación al usuario
+def emitir_blip(tipo="info"):
+    if platform.system() == "Windows":
+        import winsound
+        if tipo == "error":
+            winsound.MessageBeep(winsound.MB_ICONHAND)
+        else:
+            winsound.MessageBeep()
+
+# Limpia y normaliza una ruta ingresada por el usuario
+def formatear_ruta(ruta_original):
+    return ruta_original.strip().replace('\\', '/').strip('"').strip("'")
+
+# Abre la matriz de embeddings como memory-map (no se carga completa en RAM) junto con su metadata
+def cargar_indice(directorio):
+    ruta_matriz = os.path.join(directorio, agrupamiento.ARCHIVO_EMBEDDINGS)
+    ruta_meta = os.path.join(directorio, agrupamiento.ARCHIVO_EMBEDDINGS_META)
+
+    if not os.path.exists(ruta_matriz) or not os.path.exists(ruta_meta):
+        raise FileNotFoundError("❌ No se encontró el índice de embeddings. Ejecuta primero 03_agrupar_cluster.py.")
+
+    matriz = np.load(ruta_matriz, mmap_mode='r')
+    meta = pd.read_csv(ruta_meta, encoding="utf-8-sig")
+
+    if len(meta) != matriz.shape[0]:
+        raise ValueError("❌ La metadata no coincide con el número de embeddings guardados.")
+
+    return matriz, meta
+
+# Convierte textos libres en vectores normalizados, aplicando la misma limpieza que el script 01
+def vectorizar_consultas(textos, modelo=None):
+    if modelo is None:
+        modelo = agrupamiento.cargar_modelo()
+    textos_limpios = [limpieza.limpiar_texto_avanzado(texto) for texto in textos]
+    vectores = np.asarray(modelo.encode(textos_limpios, show_progress_bar=False), dtype=np.float32)
+    normas = np.linalg.norm(vectores, axis=1, keepdims=True)
+    return vectores / np.where(normas == 0, 1, normas)
+
+# Busca los top_k vectores más similares (similitud coseno) a cada consulta
+# Recorre la matriz por bloques: producto matricial + argpartition por bloque y fusión final de candidatos
+# Devuelve dos matrices (n_consultas x top_k): claves (filas del índice) y puntajes, ordenadas de mayor a menor
+def buscar_similares(matriz, consultas, top_k=10, filas=None, excluir=None, tam_bloque=TAM_BLOQUE):
+    consultas = np.atleast_2d(np.asarray(consultas, dtype=np.float32))
+    n_consultas = consultas.shape[0]
+
+    # 'filas' restringe la búsqueda a un subconjunto del índice (por ejemplo, un cluster)
+    total = matriz.shape[0] if filas is None else len(filas)
+    top_k = min(max(top_k, 1), total)
+
+    mejores_claves = np.empty((n_consultas, 0), dtype=np.int64)
+    mejores_puntajes = np.empty((n_consultas, 0), dtype=np.float32)
+
+    for inicio in range(0, total, tam_bloque):
+        fin = min(inicio + tam_bloque, total)
+        if filas is None:
+            claves_bloque = np.arange(inicio, fin)
+            bloque = np.asarray(matriz[inicio:fin])
+        else:
+            claves_bloque = np.asarray(filas[inicio:fin])
+            bloque = np.asarray(matriz[claves_bloque])
+
+        puntajes = consultas @ bloque.T
+
+        # Descarta la propia publicación cuando la consulta proviene de una clave del índice
+        if excluir is not None:
+            for i, clave in enumerate(excluir):
+                puntajes[i, claves_bloque == clave] = -np.inf
+
+        k_bloque = min(top_k, puntajes.shape[1])
+        idx = np.argpartition(-puntajes, k_bloque - 1, axis=1)[:, :k_bloque]
+
+        mejores_claves = np.hstack([mejores_claves, claves_bloque[idx]])
+        mejores_puntajes = np.hstack([mejores_puntajes, np.take_along_axis(puntajes, idx, axis=1)])
+
+        # Conserva solo los top_k candidatos acumulados hasta ahora
+        if mejores_puntajes.shape[1] > top_k:
+            idx = np.argpartition(-mejores_puntajes, top_k - 1, axis=1)[:, :top_k]
+            mejores_claves = np.take_along_axis(mejores_claves, idx, axis=1)
+            mejores_puntajes = np.take_along_axis(mejores_puntajes, idx, axis=1)
+
+    orden = np.argsort(-mejores_puntajes, axis=1)
+    return np.take_along_axis(mejores_claves, orden, axis=1), np.take_along_axis(mejores_puntajes, orden, axis=1)
+
+# API principal: busca posts similares a un texto libre o a una clave existente del índice
+# Opcionalmente restringe la búsqueda a un cluster (C1, C2, ...)
+def posts_similares(matriz, meta, texto=None, clave=None, top_k=10, cluster=None, modelo=None):
+    if (texto is None) == (clave is None):
+        raise ValueError("❌ Indica un texto o una clave de post (solo uno de los dos).")
+
+    if texto is not None:
+        consulta = vectorizar_consultas([texto], modelo)
+        excluir = None
+    else:
+        if not 0 <= clave < matriz.shape[0]:
+            raise ValueError(f"❌ La clave {clave} no existe en el índice.")
+        consulta = np.asarray(matriz[clave:clave + 1])
+        excluir = [clave]
+
+    filas = None
+    if cluster:
+        filas = np.flatnonzero(meta['cluster'].astype(str).str.strip().to_numpy() == cluster)
+        if len(filas) == 0:
+            raise ValueError(f"❌ El cluster '{cluster}' no existe en el índice.")
+
+    claves, puntajes = buscar_similares(matriz, consulta, top_k=top_k, filas=filas, excluir=excluir)
+
+    # Ignora posiciones vacías (solo ocurre cuando se excluye la propia clave en grupos pequeños)
+    validos = np.isfinite(puntajes[0])
+    resultado = meta.iloc[claves[0][validos]].copy()
+    resultado.insert(1, 'similitud', puntajes[0][validos].round(4))
+    return resultado.reset_index(drop=True)
+
+# -------------------------------
+# MAIN (bloque principal del programa)
+# -------------------------------
+if __name__ == "__main__":
+    try:
+        ruta_input = input("📂 Ingresa la carpeta donde está el índice de embeddings (3_Embeddings.npy): ")
+        directorio = formatear_ruta(ruta_input) or "."
+        matriz, meta = cargar_indice(directorio)
+        print(f"✅ Índice cargado: {matriz.shape[0]} posts de {matriz.shape[1]} dimensiones.")
+
+        while True:
+            print("\n🔎 ¿Cómo deseas buscar?")
+            print("1. Por texto libre")
+            print("2. Por clave de post (fila del índice)")
+            print("3. Salir")
+            opcion = input("👉 Elige una opción (1-3): ").strip()
+
+            if opcion == "3":
+                break
+            if opcion not in {"1", "2"}:
+                print("⚠️ Opción no válida.")
+                continue
+
+            top_k = input("🔢 ¿Cuántos resultados? (ENTER = 10): ").strip()
+            top_k = int(top_k) if top_k.isdigit() else 10
+            cluster = input("🏷️ Restringir a un cluster (ej. C1, ENTER = todos): ").strip().upper() or None
+
+            if opcion == "1":
+                texto = input("📝 Ingresa el texto a buscar: ")
+                # El modelo se carga una sola vez y se reutiliza en las siguientes consultas
+                modelo = agrupamiento.cargar_modelo()
+                inicio = time.perf_counter()
+                resultado = posts_similares(matriz, meta, texto=texto, top_k=top_k, cluster=cluster, modelo=modelo)
+            else:
+                clave = input("🔑 Ingresa la clave del post: ").strip()
+                if not clave.isdigit():
+                    print("⚠️ La clave debe ser un número entero.")
+                    continue
+                inicio = time.perf_counter()
+                resultado = posts_similares(matriz, meta, clave=int(clave), top_k=top_k, cluster=cluster)
+
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            print(f"\n🔝 Posts más similares ({duracion_ms:.1f} ms):\n")
+            print(resultado.to_string(index=False))
+            emitir_blip("info")
+
+    except Exception as e:
+        emitir_blip("error")
+        print(f"\n🚨 Error inesperado: {e}")
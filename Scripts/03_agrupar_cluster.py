@@ -1,8 +1,20 @@
+# Límite de hilos para torch (embeddings) y K-Means según PIPELINE_HILOS; debe ir antes de importar torch/numpy
+import presupuesto_hilos
+presupuesto_hilos.configurar_entorno()
+
 import pandas as pd
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from sklearn.cluster import KMeans
+from sklearn.decomposition import PCA
+from sklearn.random_projection import SparseRandomProjection
+from sklearn.metrics import adjusted_rand_score
 import os
 import platform
+import time
+
+# Aplica el presupuesto de hilos a torch y a los pools OpenMP/BLAS ya cargados
+presupuesto_hilos.limitar_librerias()
 
 # -------------------------------
 # CONFIGURACIÓN GENERAL
@@ -11,6 +23,50 @@ import platform
 # Número de grupos (clusters) que se desea generar para clasificar los textos
 N_CLUSTERS = 5
 
+# Modelo multilingüe usado para transformar los textos en vectores numéricos
+MODELO_EMBEDDINGS = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+# Archivos del índice de embeddings (reutilizado por 03_1_buscar_posts_similares.py)
+ARCHIVO_EMBEDDINGS = "3_Embeddings.npy"
+ARCHIVO_EMBEDDINGS_META = "3_Embeddings_meta.csv"
+
+# Centroides del K-Means ajustado (permiten asignar clusters a posts nuevos sin reentrenar)
+ARCHIVO_CENTROIDES = "3_Centroides.npy"
+
+# Reducción de dimensionalidad opcional antes de K-Means: None (sin proyección), 'pca' o 'aleatoria'
+METODO_PROYECCION = None
+
+# Dimensión final de la proyección (los embeddings de MiniLM tienen 384 dimensiones)
+DIM_PROYECCION = 64
+
+# Máximo de posts usados para ajustar la PCA (el resto solo se proyecta)
+MUESTRA_PCA = 10000
+
+# Repeticiones cronometradas de cada variante al evaluar la proyección (se alternan y se toma la más rápida)
+REPETICIONES_EVALUACION = 2
+
+# Proyección ajustada (permite proyectar posts nuevos igual que los del entrenamiento)
+ARCHIVO_PROYECCION = "3_Proyeccion.npz"
+
+# Posts representativos por cluster: los más cercanos al centroide y un conjunto diverso adicional (MMR)
+N_REPRESENTATIVOS = 3
+N_DIVERSOS = 2
+
+# Candidatos cercanos al centroide entre los que se eligen los posts diversos
+N_CANDIDATOS_MMR = 50
+
+# Peso de la cercanía al centroide frente a la redundancia en MMR (1 = solo cercanía)
+LAMBDA_MMR = 0.7
+
+# Filas de embeddings que se procesan por bloque al calcular distancias
+TAM_BLOQUE_DISTANCIAS = 65536
+
+# Columnas descriptivas que se guardan junto a cada vector (si existen)
+COLUMNAS_META = ['cluster', 'published', 'facebook_page_name', 'post_limpio']
+
+# Modelo ya cargado en este proceso (se reutiliza entre llamadas para evitar recargarlo)
+_modelo_cargado = None
+
 # -------------------------------
 # FUNCIONES
 # -------------------------------
@@ -28,12 +84,24 @@ def emitir_blip(tipo="info"):
 def formatear_ruta(ruta_original):
     return ruta_original.strip().replace('\\', '/').strip('"').strip("'")
 
+# Devuelve el modelo de embeddings, cargándolo solo la primera vez que se solicita
+def cargar_modelo():
+    global _modelo_cargado
+    if _modelo_cargado is None:
+        _modelo_cargado = SentenceTransformer(MODELO_EMBEDDINGS)
+    return _modelo_cargado
+
+# Estandariza nombres de columnas (minúsculas y guiones bajos) como espera este script
+def normalizar_columnas(df):
+    df.columns = [col.strip().lower().replace(' ', '_') for col in df.columns]
+    return df
+
 # Carga un archivo Excel y valida que exista una columna llamada 'post_limpio'
 def cargar_excel(ruta):
     try:
         df = pd.read_excel(ruta)
         # Limpia nombres de columnas para estandarizar
-        df.columns = [col.strip().lower().replace(' ', '_') for col in df.columns]
+        df = normalizar_columnas(df)
 
         if 'post_limpio' not in df.columns:
             raise ValueError("❌ El archivo debe contener la columna 'post_limpio'.")
@@ -44,30 +112,270 @@ def cargar_excel(ruta):
         print(f"❌ Error al cargar archivo: {e}")
         return None
 
+# Guarda los embeddings normalizados (float32) y su metadata para búsquedas posteriores
+# El archivo .npy se puede abrir como memory-map sin cargarlo completo en memoria
+# Si se pasan 'centroides', también se guardan para asignar clusters a posts nuevos
+# (junto con la 'proyeccion' usada, o se elimina una proyección anterior si esta corrida no la usó)
+def guardar_indice_embeddings(embeddings, df, directorio, centroides=None, proyeccion=None):
+    matriz = np.asarray(embeddings, dtype=np.float32)
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    matriz = matriz / np.where(normas == 0, 1, normas)
+
+    ruta_matriz = os.path.join(directorio, ARCHIVO_EMBEDDINGS)
+    np.save(ruta_matriz, matriz)
+
+    # La clave de cada post es su posición (fila) dentro del índice
+    meta = df[[col for col in COLUMNAS_META if col in df.columns]].copy()
+    meta.insert(0, 'clave', np.arange(len(df)))
+    ruta_meta = os.path.join(directorio, ARCHIVO_EMBEDDINGS_META)
+    meta.to_csv(ruta_meta, index=False, encoding="utf-8-sig")
+
+    if centroides is not None:
+        np.save(os.path.join(directorio, ARCHIVO_CENTROIDES), np.asarray(centroides, dtype=np.float32))
+        ruta_proyeccion = os.path.join(directorio, ARCHIVO_PROYECCION)
+        if proyeccion is not None:
+            np.savez(ruta_proyeccion, **proyeccion)
+        elif os.path.exists(ruta_proyeccion):
+            os.remove(ruta_proyeccion)
+
+    print(f"💾 Índice de embeddings guardado en: {ruta_matriz}")
+    return ruta_matriz
+
+# Ajusta una proyección lineal de los embeddings a 'dim' dimensiones
+# 'pca' se ajusta sobre una muestra; 'aleatoria' usa una proyección aleatoria dispersa (no requiere ajuste costoso)
+# Devuelve un diccionario con la matriz de componentes y la media a restar antes de proyectar
+def ajustar_proyeccion(embeddings, metodo, dim=DIM_PROYECCION, tam_muestra=MUESTRA_PCA):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    dim = min(dim, embeddings.shape[1])
+
+    if metodo == 'pca':
+        rng = np.random.default_rng(42)
+        n_muestra = min(tam_muestra, embeddings.shape[0])
+        muestra = embeddings[rng.choice(embeddings.shape[0], n_muestra, replace=False)]
+        pca = PCA(n_components=min(dim, n_muestra), random_state=42).fit(muestra)
+        componentes, media = pca.components_.T, pca.mean_
+    elif metodo == 'aleatoria':
+        srp = SparseRandomProjection(n_components=dim, random_state=42).fit(embeddings)
+        componentes = srp.components_.toarray().T if hasattr(srp.components_, 'toarray') else srp.components_.T
+        media = np.zeros(embeddings.shape[1])
+    else:
+        raise ValueError(f"❌ Método de proyección no reconocido: {metodo}. Usa 'pca' o 'aleatoria'.")
+
+    return {'componentes': componentes.astype(np.float32), 'media': media.astype(np.float32)}
+
+# Aplica una proyección ajustada con 'ajustar_proyeccion' (o cargada desde disco)
+def proyectar(embeddings, proyeccion):
+    return (np.asarray(embeddings, dtype=np.float32) - proyeccion['media']) @ proyeccion['componentes']
+
+# Compara el K-Means sobre embeddings proyectados con el K-Means sobre los embeddings originales
+# El tiempo con proyección incluye ajustarla y aplicarla; ambas variantes se calientan primero sin cronometrar
+# y luego se alternan, para que ninguna se beneficie del orden de ejecución
+# Reporta la aceleración del agrupamiento y la concordancia de etiquetas (Adjusted Rand Index)
+def evaluar_proyeccion(embeddings, etiquetas_proyectadas, metodo, dim, n_clusters, repeticiones=REPETICIONES_EVALUACION):
+    def con_proyeccion(datos):
+        return KMeans(n_clusters=n_clusters, random_state=42, n_init='auto').fit_predict(
+            proyectar(datos, ajustar_proyeccion(datos, metodo, dim)))
+
+    def sin_proyeccion(datos):
+        return KMeans(n_clusters=n_clusters, random_state=42, n_init='auto').fit_predict(datos)
+
+    # Calentamiento (carga de pools de hilos OpenMP/BLAS) sobre una muestra pequeña
+    muestra = embeddings[:min(len(embeddings), max(2000, n_clusters))]
+    con_proyeccion(muestra)
+    sin_proyeccion(muestra)
+
+    tiempos = {'con': [], 'sin': []}
+    for repeticion in range(repeticiones):
+        orden = [('con', con_proyeccion), ('sin', sin_proyeccion)]
+        for variante, funcion in (orden if repeticion % 2 == 0 else orden[::-1]):
+            inicio = time.perf_counter()
+            etiquetas = funcion(embeddings)
+            tiempos[variante].append(time.perf_counter() - inicio)
+            if variante == 'sin':
+                etiquetas_base = etiquetas
+    segundos_base, segundos_proyectado = min(tiempos['sin']), min(tiempos['con'])
+
+    evaluacion = {
+        'segundos_sin_proyeccion': round(segundos_base, 3),
+        'segundos_con_proyeccion': round(segundos_proyectado, 3),
+        'aceleracion': round(segundos_base / max(segundos_proyectado, 1e-9), 2),
+        'concordancia_ari': round(adjusted_rand_score(etiquetas_base, etiquetas_proyectadas), 4),
+    }
+    print(f"⚡ K-Means: {evaluacion['segundos_sin_proyeccion']} s sin proyección vs "
+          f"{evaluacion['segundos_con_proyeccion']} s con proyección, incluido su ajuste (x{evaluacion['aceleracion']}).")
+    print(f"🤝 Concordancia de etiquetas con la línea base (ARI): {evaluacion['concordancia_ari']}")
+    return evaluacion
+
+# Devuelve, para cada cluster, los 'n' posts más cercanos a su centroide
+# Recorre los embeddings por bloques: en cada bloque calcula la distancia de cada post a todos los centroides,
+# descarta los centroides que no son el suyo y aplica argpartition por columna (todos los clusters a la vez)
+# Resultado: matrices (n x clusters) de índices de fila y distancias; -1 donde el cluster tiene menos de 'n' posts
+def posts_cercanos_centroide(vectores, etiquetas, centroides, n=N_REPRESENTATIVOS, tam_bloque=TAM_BLOQUE_DISTANCIAS):
+    vectores = np.asarray(vectores, dtype=np.float32)
+    centroides = np.asarray(centroides, dtype=np.float32)
+    etiquetas = np.asarray(etiquetas)
+    n_clusters = centroides.shape[0]
+    normas_centroides = (centroides ** 2).sum(axis=1)
+
+    mejores_idx = np.empty((0, n_clusters), dtype=np.int64)
+    mejores_dist = np.empty((0, n_clusters), dtype=np.float32)
+
+    for inicio in range(0, vectores.shape[0], tam_bloque):
+        bloque = vectores[inicio:inicio + tam_bloque]
+        distancias = (bloque ** 2).sum(axis=1)[:, None] - 2 * bloque @ centroides.T + normas_centroides
+        distancias[etiquetas[inicio:inicio + tam_bloque, None] != np.arange(n_clusters)] = np.inf
+
+        m = min(n, bloque.shape[0])
+        seleccion = np.argpartition(distancias, m - 1, axis=0)[:m]
+        mejores_idx = np.vstack([mejores_idx, seleccion + inicio])
+        mejores_dist = np.vstack([mejores_dist, np.take_along_axis(distancias, seleccion, axis=0)])
+
+        # Conserva solo los 'n' candidatos acumulados de cada cluster
+        if mejores_idx.shape[0] > n:
+            seleccion = np.argpartition(mejores_dist, n - 1, axis=0)[:n]
+            mejores_idx = np.take_along_axis(mejores_idx, seleccion, axis=0)
+            mejores_dist = np.take_along_axis(mejores_dist, seleccion, axis=0)
+
+    orden = np.argsort(mejores_dist, axis=0)
+    mejores_idx = np.take_along_axis(mejores_idx, orden, axis=0)
+    mejores_dist = np.take_along_axis(mejores_dist, orden, axis=0)
+    mejores_idx[~np.isfinite(mejores_dist)] = -1
+    return mejores_idx, mejores_dist
+
+# Elige 'n_diversos' posts adicionales por cluster con max-marginal-relevance (MMR)
+# 'candidatos' es la matriz (candidatos x clusters) de 'posts_cercanos_centroide', ordenada por cercanía;
+# sus primeras 'n_cercanos' filas son los posts ya elegidos. En cada paso agrega, para todos los clusters a la vez,
+# el candidato que maximiza λ·sim(post, centroide) − (1−λ)·máx sim(post, elegidos)
+# Devuelve una matriz (n_diversos x clusters) de índices de fila (-1 si no hay candidatos suficientes)
+def posts_diversos_mmr(vectores, candidatos, centroides, n_cercanos=N_REPRESENTATIVOS, n_diversos=N_DIVERSOS,
+                       lambda_mmr=LAMBDA_MMR):
+    validos = candidatos >= 0
+    n_clusters = centroides.shape[0]
+
+    # Similitud coseno sobre vectores normalizados (candidatos x clusters x dimensiones)
+    vectores_candidatos = np.asarray(vectores, dtype=np.float32)[np.where(validos, candidatos, 0)]
+    vectores_candidatos /= np.maximum(np.linalg.norm(vectores_candidatos, axis=-1, keepdims=True), 1e-12)
+    centroides_norm = np.asarray(centroides, dtype=np.float32)
+    centroides_norm = centroides_norm / np.maximum(np.linalg.norm(centroides_norm, axis=-1, keepdims=True), 1e-12)
+
+    sim_centroide = np.einsum('mkd,kd->km', vectores_candidatos, centroides_norm)
+    sim_pares = np.einsum('mkd,nkd->kmn', vectores_candidatos, vectores_candidatos)
+
+    elegidos = np.zeros((n_clusters, candidatos.shape[0]), dtype=bool)
+    elegidos[:, :n_cercanos] = validos[:n_cercanos].T
+    max_sim_elegidos = np.where(elegidos[:, None, :], sim_pares, -np.inf).max(axis=2)
+    max_sim_elegidos[~np.isfinite(max_sim_elegidos)] = 0
+
+    diversos = np.full((n_diversos, n_clusters), -1, dtype=np.int64)
+    clusters = np.arange(n_clusters)
+    for paso in range(n_diversos):
+        puntaje = lambda_mmr * sim_centroide - (1 - lambda_mmr) * max_sim_elegidos
+        puntaje[elegidos | ~validos.T] = -np.inf
+        mejor = puntaje.argmax(axis=1)
+        hay_candidato = np.isfinite(puntaje[clusters, mejor])
+
+        diversos[paso, hay_candidato] = candidatos[mejor[hay_candidato], clusters[hay_candidato]]
+        elegidos[clusters[hay_candidato], mejor[hay_candidato]] = True
+        max_sim_elegidos = np.where(hay_candidato[:, None],
+                                    np.maximum(max_sim_elegidos, sim_pares[clusters, :, mejor]),
+                                    max_sim_elegidos)
+
+    return diversos
+
+# Marca en la columna 'representativo' los posts cercanos al centroide ("cercano 1", ...) y los diversos ("diverso 1", ...)
+# Una sola pasada por bloques obtiene los candidatos: los primeros son los cercanos y el resto alimenta a MMR
+def marcar_representativos(df, vectores, etiquetas, centroides, n_cercanos=N_REPRESENTATIVOS, n_diversos=N_DIVERSOS,
+                           n_candidatos=N_CANDIDATOS_MMR):
+    n_total = max(n_candidatos, n_cercanos + n_diversos) if n_diversos > 0 else n_cercanos
+    candidatos, _ = posts_cercanos_centroide(vectores, etiquetas, centroides, n_total)
+    cercanos = candidatos[:n_cercanos]
+    marcas = np.full(len(df), "", dtype=object)
+    for orden in range(cercanos.shape[0]):
+        filas = cercanos[orden][cercanos[orden] >= 0]
+        marcas[filas] = f"cercano {orden + 1}"
+
+    if n_diversos > 0:
+        diversos = posts_diversos_mmr(vectores, candidatos, centroides, n_cercanos, n_diversos)
+        for orden in range(diversos.shape[0]):
+            filas = diversos[orden][diversos[orden] >= 0]
+            marcas[filas] = f"diverso {orden + 1}"
+
+    df['representativo'] = marcas
+    return df
+
 # Genera embeddings semánticos para cada texto y los agrupa usando K-Means
-def generar_clusters(df, n_clusters=N_CLUSTERS):
+# Si se indica 'directorio_indice', los embeddings se conservan para la búsqueda de posts similares
+# Si se pasa 'modelo', se usa ese modelo ya cargado (por ejemplo, uno compartido en procesamiento por lotes)
+# Si se indica 'metodo_proyeccion', K-Means corre sobre los embeddings reducidos a 'dim_proyeccion' dimensiones;
+# con 'evaluar_reduccion' también se ejecuta K-Means sin proyección para medir aceleración y concordancia
+def generar_clusters(df, n_clusters=N_CLUSTERS, directorio_indice=None, modelo=None,
+                     metodo_proyeccion=METODO_PROYECCION, dim_proyeccion=DIM_PROYECCION, evaluar_reduccion=False):
     print("🔄 Generando embeddings semánticos...")
 
     # Modelo multilingüe para transformar los textos en vectores numéricos
-    modelo = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+    if modelo is None:
+        modelo = cargar_modelo()
     textos = df['post_limpio'].fillna('').tolist()
     embeddings = modelo.encode(textos, show_progress_bar=True)
 
+    # Reducción de dimensionalidad opcional
+    proyeccion = None
+    vectores = embeddings
+    if metodo_proyeccion:
+        print(f"📉 Proyectando embeddings ({metodo_proyeccion}, {dim_proyeccion} dimensiones)...")
+        proyeccion = ajustar_proyeccion(embeddings, metodo_proyeccion, dim_proyeccion)
+        vectores = proyectar(embeddings, proyeccion)
+
     print("🔍 Agrupando en clusters...")
 
     # Agrupamiento usando K-Means
     kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init='auto')
-    etiquetas_numericas = kmeans.fit_predict(embeddings)
+    etiquetas_numericas = kmeans.fit_predict(vectores)
+
+    if proyeccion is not None and evaluar_reduccion:
+        evaluar_proyeccion(embeddings, etiquetas_numericas, metodo_proyeccion, dim_proyeccion, n_clusters)
 
     # Asigna etiquetas legibles (C1, C2, ...) a cada registro
     etiquetas_alfanumericas = [f"C{i+1}" for i in etiquetas_numericas]
     df['cluster'] = etiquetas_alfanumericas
 
+    # Posts de ejemplo de cada cluster (se usan en el prompt del script 05)
+    df = marcar_representativos(df, vectores, etiquetas_numericas, kmeans.cluster_centers_)
+
+    if directorio_indice is not None:
+        guardar_indice_embeddings(embeddings, df, directorio_indice, centroides=kmeans.cluster_centers_, proyeccion=proyeccion)
+
     return df
 
+# Carga los centroides guardados por una ejecución previa de este script
+def cargar_centroides(directorio):
+    ruta = os.path.join(directorio, ARCHIVO_CENTROIDES)
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"❌ No se encontró {ARCHIVO_CENTROIDES}. Ejecuta primero 03_agrupar_cluster.py.")
+    return np.load(ruta)
+
+# Carga la proyección guardada junto a los centroides (None si el K-Means se ajustó sin proyección)
+def cargar_proyeccion(directorio):
+    ruta = os.path.join(directorio, ARCHIVO_PROYECCION)
+    if not os.path.exists(ruta):
+        return None
+    with np.load(ruta) as datos:
+        return {'componentes': datos['componentes'], 'media': datos['media']}
+
+# Asigna cada embedding al centroide más cercano (equivalente a kmeans.predict) y devuelve etiquetas C1, C2, ...
+# Si los centroides se ajustaron sobre embeddings proyectados, se debe pasar la misma 'proyeccion'
+def asignar_clusters(embeddings, centroides, proyeccion=None):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if proyeccion is not None:
+        embeddings = proyectar(embeddings, proyeccion)
+    # ||x - c||² = ||x||² - 2·x·c + ||c||² ; ||x||² no cambia el argmin, por eso se omite
+    distancias = (centroides ** 2).sum(axis=1) - 2 * embeddings @ centroides.T
+    return [f"C{i+1}" for i in distancias.argmin(axis=1)]
+
 # Calcula métricas de engagement a partir de las columnas de redes sociales
-def calcular_metricas_engagement(df):
-    print("📊 Calculando métricas de engagement...")
+def calcular_metricas_engagement(df, verbose=True):
+    if verbose:
+        print("📊 Calculando métricas de engagement...")
 
     columnas_necesarias = ['facebook_reactions', 'facebook_shares', 'facebook_comments', 'total_interactions']
     
@@ -113,12 +421,28 @@ if __name__ == "__main__":
         if df is not None:
             print(f"✅ {len(df)} registros cargados. Procesando...")
 
-            # Agrupa los textos en clusters y calcula métricas de engagement
-            df = generar_clusters(df)
+            # Reducción de dimensionalidad opcional antes de K-Means (útil en corpus grandes)
+            print("\n📉 ¿Reducir la dimensionalidad de los embeddings antes de K-Means?")
+            print("1. No")
+            print("2. PCA (ajustada sobre una muestra)")
+            print("3. Proyección aleatoria dispersa")
+            opcion = input("👉 Elige una opción (1-3): ").strip()
+            metodo = {"2": "pca", "3": "aleatoria"}.get(opcion)
+
+            dim = DIM_PROYECCION
+            evaluar = False
+            if metodo:
+                dim_input = input(f"🔢 Dimensión final (ENTER = {DIM_PROYECCION}): ").strip()
+                dim = int(dim_input) if dim_input.isdigit() and int(dim_input) > 0 else DIM_PROYECCION
+                evaluar = input("⚖️ ¿Comparar con K-Means sin proyección? (s/n): ").strip().lower() == "s"
+
+            # Agrupa los textos en clusters (conservando los embeddings) y calcula métricas de engagement
+            directorio = os.path.dirname(ruta)
+            df = generar_clusters(df, directorio_indice=directorio, metodo_proyeccion=metodo,
+                                  dim_proyeccion=dim, evaluar_reduccion=evaluar)
             df = calcular_metricas_engagement(df)
 
             # Define la ruta de salida sin sobrescribir archivos existentes
-            directorio = os.path.dirname(ruta)
             salida_base = os.path.join(directorio, "3_Cluster_Indicadores.xlsx")
             salida_final = generar_nombre_unico(salida_base)
 
@@ -0,0 +1,302 @@
+# -----------------------------------------------
+# 04_1_tendencias_keywords.py
+# Seguimiento de keywords en flujo continuo con memoria acotada (algoritmo Space-Saving)
+# - Top de términos por ventana de tiempo y por cluster, con un máximo fijo de términos monitoreados
+# - Detección de términos emergentes: los que más crecen en la ventana actual frente a la anterior
+# - Reporte de cotas de error y comparación opcional con conteos exactos
+# Uso: Ejecutar sobre un archivo con 'post_limpio', 'published' y 'cluster' (3_Cluster_Indicadores.xlsx, 8_Dataset_Continuo.csv)
+# -----------------------------------------------
+
+import heapq
+import os
+import platform
+from collections import Counter
+
+import pandas as pd
+
+import etapas
+
+keywords_post = etapas.cargar_etapa("02_extraer_keywords_post")
+
+# -------------------------------
+# CONFIGURACIÓN GENERAL
+# -------------------------------
+
+# Máximo de términos monitoreados por cada combinación (ventana, cluster)
+CAPACIDAD = 500
+
+# Tamaño de ventana (frecuencia de pandas: 'D' diario, 'W' semanal, 'M' mensual)
+VENTANA = 'W'
+
+# Etiqueta usada para el seguimiento que agrega todos los clusters
+TODOS = "TODOS"
+
+# Mínimo de apariciones en la ventana actual para considerar un término como emergente
+MIN_APARICIONES = 3
+
+# Suavizado de frecuencias (evita divisiones por cero cuando el término no existía antes)
+SUAVIZADO = 1.0
+
+# Función para emitir sonidos en Windows como retroalimentación al usuario
+def reproducir_blip(tipo="ok"):
+    if platform.system() == "Windows":
+        import winsound
+        winsound.MessageBeep(winsound.MB_ICONHAND if tipo == "error" else winsound.MB_OK)
+
+# Limpia y estandariza la ruta ingresada por el usuario
+def formatear_ruta(ruta_original):
+    return ruta_original.strip().replace("\\", "/").strip('"').strip("'")
+
+
+class SpaceSaving:
+    """
+    Conteo aproximado de los términos más frecuentes usando como máximo 'capacidad' contadores.
+    Cada conteo sobreestima el real en a lo sumo 'error' (y nunca más que total / capacidad);
+    todo término con frecuencia real mayor a total / capacidad está garantizado en el resumen.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD):
+        self.capacidad = capacidad
+        self.conteos = {}
+        self.errores = {}
+        # Montículo de (conteo, término); las entradas pueden estar desactualizadas y se corrigen al extraer el mínimo
+        self.monticulo = []
+        self.total = 0
+
+    # Extrae el término con menor conteo, corrigiendo entradas desactualizadas del montículo
+    def _extraer_minimo(self):
+        while True:
+            conteo, termino = heapq.heappop(self.monticulo)
+            actual = self.conteos.get(termino)
+            if actual == conteo:
+                return termino, conteo
+            if actual is not None:
+                heapq.heappush(self.monticulo, (actual, termino))
+
+    def agregar(self, termino, peso=1):
+        self.total += peso
+        if termino in self.conteos:
+            self.conteos[termino] += peso
+            return
+        if len(self.conteos) < self.capacidad:
+            self.conteos[termino] = peso
+            self.errores[termino] = 0
+        else:
+            # Reemplaza al término con menor conteo y hereda su conteo como error máximo
+            victima, minimo = self._extraer_minimo()
+            del self.conteos[victima]
+            del self.errores[victima]
+            self.conteos[termino] = minimo + peso
+            self.errores[termino] = minimo
+        heapq.heappush(self.monticulo, (self.conteos[termino], termino))
+
+    # Cota superior del conteo de cualquier término no monitoreado
+    def minimo(self):
+        if len(self.conteos) < self.capacidad:
+            return 0
+        return min(self.conteos.values())
+
+    # Conteo estimado (cota superior) de un término
+    def estimar(self, termino):
+        return self.conteos.get(termino, self.minimo())
+
+    # Lista de (término, conteo estimado, mínimo garantizado) ordenada de mayor a menor
+    def top(self, n=None):
+        ordenados = sorted(self.conteos.items(), key=lambda par: par[1], reverse=True)[:n]
+        return [(termino, conteo, conteo - self.errores[termino]) for termino, conteo in ordenados]
+
+    # Máximo error posible en cualquier conteo
+    def cota_error(self):
+        return self.total / self.capacidad
+
+
+class RastreadorKeywords:
+    """
+    Procesa posts en orden cronológico y mantiene un resumen Space-Saving por (ventana, cluster).
+    Solo se conservan la ventana actual y la anterior, por lo que la memoria queda acotada a
+    2 × (clusters + 1) × capacidad contadores, sin importar cuántos posts lleguen.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD, ventana=VENTANA):
+        self.capacidad = capacidad
+        self.ventana = ventana
+        self.stopwords_es = set(keywords_post.stopwords.words('spanish'))
+        self.tokenizer = keywords_post.RegexpTokenizer(r'\w+')
+        self.ventana_actual = None
+        self.actual = {}
+        self.previa = {}
+        self.posts_actual = Counter()
+        self.posts_previa = Counter()
+        # Posts con fecha anterior a la ventana actual (llegaron fuera de orden): se descartan y se reportan
+        self.posts_descartados = 0
+        # Reportes de ventanas ya cerradas
+        self.historial_top = []
+        self.historial_emergentes = []
+
+    def _resumen(self, cluster):
+        if cluster not in self.actual:
+            self.actual[cluster] = SpaceSaving(self.capacidad)
+        return self.actual[cluster]
+
+    # Agrega un post al flujo; si pertenece a una ventana nueva, cierra la ventana anterior
+    # Devuelve False si el post es anterior a la ventana actual (ya cerrada para él) y se descartó
+    def agregar_post(self, fecha, cluster, texto):
+        ventana = pd.Timestamp(fecha).to_period(self.ventana)
+        if self.ventana_actual is None:
+            self.ventana_actual = ventana
+        elif ventana > self.ventana_actual:
+            self.cerrar_ventana()
+            # Si hubo ventanas sin posts, la ventana previa de la nueva está vacía (no es la última con posts)
+            if ventana > self.ventana_actual + 1:
+                self.previa, self.posts_previa = {}, Counter()
+            self.ventana_actual = ventana
+        elif ventana < self.ventana_actual:
+            self.posts_descartados += 1
+            return False
+
+        tokens = keywords_post.filtrar_tokens(texto, self.stopwords_es, self.tokenizer)
+        for grupo in (TODOS, str(cluster)):
+            resumen = self._resumen(grupo)
+            for token in tokens:
+                resumen.agregar(token)
+            self.posts_actual[grupo] += 1
+        return True
+
+    # Términos que más crecen en la ventana actual frente a la anterior (frecuencia por post)
+    def emergentes(self, cluster=TODOS, n=20):
+        actual = self.actual.get(cluster)
+        if actual is None:
+            return []
+        previa = self.previa.get(cluster)
+        posts_actual = self.posts_actual[cluster]
+        posts_previa = self.posts_previa[cluster]
+
+        resultado = []
+        for termino, conteo, garantizado in actual.top():
+            if garantizado < MIN_APARICIONES:
+                continue
+            # Se usa el mínimo garantizado de la ventana actual y la cota superior de la anterior:
+            # el crecimiento reportado es conservador
+            conteo_previo = previa.estimar(termino) if previa is not None else 0
+            frec_actual = garantizado / max(posts_actual, 1)
+            frec_previa = conteo_previo / max(posts_previa, 1)
+            crecimiento = (garantizado + SUAVIZADO) / max(posts_actual, 1) / ((conteo_previo + SUAVIZADO) / max(posts_previa, 1))
+            resultado.append((termino, garantizado, conteo_previo, round(frec_actual, 4), round(frec_previa, 4), round(crecimiento, 3)))
+
+        resultado.sort(key=lambda fila: fila[-1], reverse=True)
+        return resultado[:n]
+
+    # Guarda el top y los emergentes de la ventana actual y la desplaza a 'previa'
+    def cerrar_ventana(self, n=20):
+        for cluster, resumen in self.actual.items():
+            for termino, conteo, garantizado in resumen.top(n):
+                self.historial_top.append({
+                    'ventana': str(self.ventana_actual), 'cluster': cluster, 'palabra': termino,
+                    'frecuencia_estimada': conteo, 'minimo_garantizado': garantizado,
+                    'cota_error': round(resumen.cota_error(), 2),
+                })
+            for termino, conteo, previo, frec_actual, frec_previa, crecimiento in self.emergentes(cluster, n):
+                self.historial_emergentes.append({
+                    'ventana': str(self.ventana_actual), 'cluster': cluster, 'palabra': termino,
+                    'apariciones': conteo, 'apariciones_ventana_previa': previo,
+                    'frecuencia_por_post': frec_actual, 'frecuencia_por_post_previa': frec_previa,
+                    'crecimiento': crecimiento,
+                })
+        self.previa, self.actual = self.actual, {}
+        self.posts_previa, self.posts_actual = self.posts_actual, Counter()
+
+    # Cierra la última ventana y devuelve los reportes acumulados
+    def finalizar(self, n=20):
+        if self.actual:
+            self.cerrar_ventana(n)
+        if self.posts_descartados:
+            print(f"⚠️ {self.posts_descartados} posts llegaron fuera de orden (anteriores a la ventana en curso) y se descartaron.")
+        df_top = pd.DataFrame(self.historial_top)
+        df_emergentes = pd.DataFrame(self.historial_emergentes)
+        if not df_emergentes.empty:
+            df_emergentes = df_emergentes.sort_values(['ventana', 'cluster', 'crecimiento'], ascending=[True, True, False])
+        return df_top, df_emergentes
+
+# Recorre un DataFrame como si fuera un flujo (orden cronológico)
+def procesar_dataframe(df, capacidad=CAPACIDAD, ventana=VENTANA, n=20):
+    df = df.dropna(subset=['published']).sort_values('published')
+    rastreador = RastreadorKeywords(capacidad, ventana)
+    for fecha, cluster, texto in zip(df['published'], df['cluster'], df['post_limpio'].fillna('')):
+        rastreador.agregar_post(fecha, cluster, texto)
+    return rastreador.finalizar(n)
+
+# Compara el top aproximado de cada (ventana, cluster) con conteos exactos
+def evaluar_contra_exacto(df, df_top, ventana=VENTANA):
+    df = df.dropna(subset=['published'])
+    stopwords_es = set(keywords_post.stopwords.words('spanish'))
+    tokenizer = keywords_post.RegexpTokenizer(r'\w+')
+
+    exactos = {}
+    for fecha, cluster, texto in zip(df['published'], df['cluster'], df['post_limpio'].fillna('')):
+        clave_ventana = str(pd.Timestamp(fecha).to_period(ventana))
+        tokens = keywords_post.filtrar_tokens(texto, stopwords_es, tokenizer)
+        for grupo in (TODOS, str(cluster)):
+            exactos.setdefault((clave_ventana, grupo), Counter()).update(tokens)
+
+    filas = []
+    for (clave_ventana, grupo), top in df_top.groupby(['ventana', 'cluster']):
+        exacto = exactos.get((clave_ventana, grupo), Counter())
+        reales = top['palabra'].map(exacto).fillna(0)
+        errores = top['frecuencia_estimada'] - reales
+        top_real = {palabra for palabra, _ in exacto.most_common(len(top))}
+        filas.append({
+            'ventana': clave_ventana, 'cluster': grupo,
+            'error_maximo': int(errores.max()),
+            'error_relativo_medio': round((errores / reales.replace(0, 1)).mean(), 4),
+            'cota_teorica': top['cota_error'].iloc[0],
+            'recall_top': round(len(top_real & set(top['palabra'])) / max(len(top_real), 1), 4),
+        })
+    return pd.DataFrame(filas)
+
+# -----------------------------------
+# ▶️ MAIN: Flujo principal de ejecución
+# -----------------------------------
+if __name__ == "__main__":
+    try:
+        ruta = formatear_ruta(input("📂 Ingresa la ruta del archivo con 'post_limpio', 'published' y 'cluster': "))
+        if ruta.lower().endswith(".csv"):
+            df = pd.read_csv(ruta, encoding="utf-8-sig")
+        else:
+            df = pd.read_excel(ruta)
+        df.columns = [col.strip().lower() for col in df.columns]
+
+        faltantes = {'post_limpio', 'published', 'cluster'} - set(df.columns)
+        if faltantes:
+            raise ValueError(f"El archivo no tiene las columnas: {', '.join(sorted(faltantes))}.")
+        df['published'] = pd.to_datetime(df['published'], errors='coerce')
+
+        ventana = input(f"🗓️ Tamaño de ventana (D = diaria, W = semanal, M = mensual; ENTER = {VENTANA}): ").strip().upper() or VENTANA
+        capacidad = input(f"🧠 Máximo de términos monitoreados por ventana y cluster (ENTER = {CAPACIDAD}): ").strip()
+        capacidad = int(capacidad) if capacidad.isdigit() and int(capacidad) > 0 else CAPACIDAD
+
+        df_top, df_emergentes = procesar_dataframe(df, capacidad, ventana)
+
+        print("\n🚀 TÉRMINOS EMERGENTES (TODOS LOS CLUSTERS, ÚLTIMA VENTANA)")
+        if not df_emergentes.empty:
+            ultima = df_emergentes[(df_emergentes['cluster'] == TODOS) & (df_emergentes['ventana'] == df_emergentes['ventana'].max())]
+            print(ultima.head(10).to_string(index=False))
+
+        hojas = {'Top_Ventana': df_top, 'Emergentes': df_emergentes}
+        if input("\n📏 ¿Comparar con conteos exactos? (s/n): ").strip().lower() == "s":
+            df_error = evaluar_contra_exacto(df, df_top, ventana)
+            print(df_error.to_string(index=False))
+            hojas['Error'] = df_error
+
+        salida = os.path.join(os.path.dirname(ruta) or ".", "4_1_Tendencias_Keywords.xlsx")
+        with pd.ExcelWriter(salida) as writer:
+            for nombre_hoja, df_hoja in hojas.items():
+                df_hoja.to_excel(writer, sheet_name=nombre_hoja, index=False)
+
+        reproducir_blip("ok")
+        print(f"\n✅ Tendencias exportadas en:\n{salida}")
+
+    except Exception as e:
+        reproducir_blip("error")
+        print(f"❌ Error al analizar tendencias: {e}")
+
+    input("\nPresiona ENTER para salir...")
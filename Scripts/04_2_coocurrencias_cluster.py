@@ -0,0 +1,155 @@
+# -----------------------------------------------
+# 04_2_coocurrencias_cluster.py
+# Grafo de co-ocurrencia de keywords por cluster (qué palabras aparecen juntas en un mismo post)
+# - Matriz documento-término binaria construida una sola vez (mismo filtro que 02_extraer_keywords_post.py)
+# - Por cluster, la matriz término-término es el producto disperso Xcᵀ·Xc de sus filas
+# - Se conservan los top_k pares por cluster, ordenados por PMI o por número de posts en común
+# Uso: Ejecutar sobre 3_Cluster_Indicadores.xlsx; la lista de aristas se puede abrir en Gephi u otra herramienta de grafos
+# -----------------------------------------------
+
+# Hilos de BLAS/scikit-learn según PIPELINE_HILOS (antes de importar numpy/scipy)
+import presupuesto_hilos
+presupuesto_hilos.configurar_entorno()
+
+import os
+import platform
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import corpus_tokenizado
+import etapas
+
+keywords_post = etapas.cargar_etapa("02_extraer_keywords_post")
+
+# -------------------------------
+# CONFIGURACIÓN GENERAL
+# -------------------------------
+
+# Pares conservados por cluster
+TOP_K = 50
+
+# Criterio de orden: "pmi" (asociación) o "conteo" (posts en común)
+CRITERIO = "pmi"
+
+# Mínimo de posts en común para considerar un par (el PMI es inestable con conteos muy bajos)
+MIN_COOCURRENCIAS = 3
+
+# Función para emitir sonidos en Windows como retroalimentación al usuario
+def reproducir_blip(tipo="ok"):
+    if platform.system() == "Windows":
+        import winsound
+        winsound.MessageBeep(winsound.MB_ICONHAND if tipo == "error" else winsound.MB_OK)
+
+# Limpia y estandariza la ruta ingresada por el usuario
+def formatear_ruta(ruta_original):
+    return ruta_original.strip().replace("\\", "/").strip('"').strip("'")
+
+# Matriz documento-término binaria (1 si la palabra aparece en el post) en formato CSR
+# Con el 'corpus' tokenizado de la etapa 01 se arma desde los ids de token, sin procesar 'textos'
+def matriz_binaria(textos, corpus=None):
+    matriz, vocabulario = keywords_post.construir_matriz_terminos(textos, corpus=corpus)
+    matriz.data[:] = 1
+    return matriz, vocabulario
+
+# Pares de términos que co-ocurren en las filas de 'matriz_cluster', con su conteo y PMI
+# PMI = log( P(a,b) / (P(a)·P(b)) ), con probabilidades estimadas sobre los posts del cluster
+# Devuelve (términos a, términos b, co-ocurrencias, docs con a, docs con b, pmi) solo para a < b
+def pares_cluster(matriz_cluster, min_coocurrencias=MIN_COOCURRENCIAS):
+    n_posts = matriz_cluster.shape[0]
+
+    # Solo se multiplican las columnas presentes en el cluster (vocabulario local)
+    presentes = np.flatnonzero(matriz_cluster.getnnz(axis=0))
+    local = matriz_cluster[:, presentes]
+    docs_termino = np.asarray(local.sum(axis=0)).ravel()
+
+    # Matriz término-término dispersa; el triángulo superior evita duplicados y la diagonal
+    coocurrencias = sp.triu(local.T @ local, k=1).tocoo()
+    mascara = coocurrencias.data >= min_coocurrencias
+    filas, columnas, conteos = coocurrencias.row[mascara], coocurrencias.col[mascara], coocurrencias.data[mascara]
+
+    pmi = np.log(conteos * n_posts / (docs_termino[filas] * docs_termino[columnas]))
+    return presentes[filas], presentes[columnas], conteos, docs_termino[filas], docs_termino[columnas], pmi
+
+# Aristas (pares de keywords) por cluster, con los top_k pares según 'criterio'
+def coocurrencias_por_cluster(df, top_k=TOP_K, criterio=CRITERIO, min_coocurrencias=MIN_COOCURRENCIAS, corpus=None):
+    textos = df['post_limpio'].fillna('').astype(str).tolist() if corpus is None else None
+    matriz, vocabulario = matriz_binaria(textos, corpus)
+    clusters = df['cluster'].astype(str).str.strip().to_numpy()
+    aristas = []
+
+    for cluster in np.unique(clusters):
+        filas_cluster = np.flatnonzero(clusters == cluster)
+        a, b, conteos, docs_a, docs_b, pmi = pares_cluster(matriz[filas_cluster], min_coocurrencias)
+        if len(conteos) == 0:
+            continue
+
+        # Top_k sin ordenar todos los pares; desempate por conteo
+        puntaje = pmi if criterio == "pmi" else conteos.astype(np.float64)
+        if len(puntaje) > top_k:
+            elegidos = np.argpartition(-puntaje, top_k - 1)[:top_k]
+        else:
+            elegidos = np.arange(len(puntaje))
+        elegidos = elegidos[np.lexsort((-conteos[elegidos], -puntaje[elegidos]))]
+
+        aristas.append(pd.DataFrame({
+            'cluster': cluster,
+            'origen': vocabulario[a[elegidos]],
+            'destino': vocabulario[b[elegidos]],
+            'coocurrencias': conteos[elegidos].astype(int),
+            'posts_origen': docs_a[elegidos].astype(int),
+            'posts_destino': docs_b[elegidos].astype(int),
+            'posts_cluster': len(filas_cluster),
+            'pmi': pmi[elegidos].round(4),
+        }))
+
+    columnas = ['cluster', 'origen', 'destino', 'coocurrencias', 'posts_origen', 'posts_destino', 'posts_cluster', 'pmi']
+    return pd.concat(aristas, ignore_index=True) if aristas else pd.DataFrame(columns=columnas)
+
+# -------------------------------
+# MAIN (bloque principal del programa)
+# -------------------------------
+if __name__ == "__main__":
+    try:
+        ruta = formatear_ruta(input("📂 Ingresa la ruta del archivo con 'post_limpio' y 'cluster' (3_Cluster_Indicadores.xlsx): "))
+        if ruta.lower().endswith(".csv"):
+            df = pd.read_csv(ruta, encoding="utf-8-sig")
+        else:
+            df = pd.read_excel(ruta)
+        df.columns = [col.strip().lower() for col in df.columns]
+
+        faltantes = {'post_limpio', 'cluster'} - set(df.columns)
+        if faltantes:
+            raise ValueError(f"El archivo no tiene las columnas: {', '.join(sorted(faltantes))}.")
+
+        criterio = input("📐 Ordenar pares por 1. PMI (asociación) o 2. Conteo (posts en común)? (ENTER = 1): ").strip()
+        criterio = "conteo" if criterio == "2" else "pmi"
+        top_k = input(f"🔝 ¿Cuántos pares por cluster? (ENTER = {TOP_K}): ").strip()
+        top_k = int(top_k) if top_k.isdigit() and int(top_k) > 0 else TOP_K
+
+        # Si la etapa 01 generó el corpus tokenizado de este dataset, la matriz se arma desde los ids de token
+        corpus = corpus_tokenizado.cargar_corpus_alineado(os.path.dirname(ruta) or ".", df['post_limpio'].fillna(''))
+        if corpus is not None:
+            print("🧩 Usando el corpus tokenizado de la etapa 01.")
+
+        df_aristas = coocurrencias_por_cluster(df, top_k, criterio, corpus=corpus)
+
+        print(f"\n🕸️ {len(df_aristas)} aristas en {df_aristas['cluster'].nunique()} clusters. Primeras filas:")
+        print(df_aristas.head(10).to_string(index=False))
+
+        # La lista de aristas en CSV se importa directamente en herramientas de grafos (Gephi, etc.)
+        directorio = os.path.dirname(ruta) or "."
+        salida_excel = os.path.join(directorio, "4_2_Coocurrencias_Cluster.xlsx")
+        salida_csv = os.path.join(directorio, "4_2_Coocurrencias_Cluster.csv")
+        df_aristas.to_excel(salida_excel, index=False)
+        df_aristas.to_csv(salida_csv, index=False, encoding="utf-8-sig")
+
+        reproducir_blip("ok")
+        print(f"\n✅ Co-ocurrencias exportadas en:\n{salida_excel}\n{salida_csv}")
+
+    except Exception as e:
+        reproducir_blip("error")
+        print(f"❌ Error al calcular co-ocurrencias: {e}")
+
+    input("\nPresiona ENTER para salir...")
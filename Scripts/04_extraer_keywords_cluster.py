@@ -6,6 +6,8 @@ from collections import Counter
 from nltk.corpus import stopwords
 from nltk.tokenize import RegexpTokenizer
 
+import corpus_tokenizado
+
 # -----------------------------
 # 🔊 Función para emitir sonido como retroalimentación
 # -----------------------------
@@ -84,6 +86,26 @@ def analizar_frecuencia_por_cluster(df, top_n=30):
 
     return pd.DataFrame(resultados)
 
+# -----------------------------
+# 🧩 Mismo análisis sobre el corpus tokenizado de la etapa 01 (ids de token alineados con las filas de df)
+# Los conteos de todos los clusters se obtienen en una sola pasada vectorizada
+# -----------------------------
+def analizar_frecuencia_por_cluster_corpus(df, corpus, top_n=30):
+    mascara = corpus.mascara_keywords(set(stopwords.words('spanish')))
+    codigos, clusters = pd.factorize(df['cluster'], sort=True)
+    conteos, primera_aparicion = corpus_tokenizado.frecuencias_keywords(corpus, mascara, codigos, len(clusters))
+    resultados = []
+
+    for codigo, cluster_label in enumerate(clusters):
+        for id_palabra in corpus_tokenizado.top_ids(conteos[codigo], primera_aparicion[codigo], top_n):
+            resultados.append({
+                'cluster': cluster_label,
+                'palabra': corpus.vocabulario[id_palabra],
+                'frecuencia': int(conteos[codigo, id_palabra])
+            })
+
+    return pd.DataFrame(resultados)
+
 # -----------------------------
 # 💾 Exportación de resultados en varios formatos
 # -----------------------------
@@ -119,8 +141,13 @@ if __name__ == "__main__":
     if df is not None:
         print("\n✅ Archivo cargado. Realizando análisis de frecuencia...")
 
-        # Ejecuta análisis de frecuencia por cluster
-        df_frec = analizar_frecuencia_por_cluster(df)
+        # Ejecuta análisis de frecuencia por cluster (sobre el corpus tokenizado de la etapa 01 si está disponible)
+        corpus = corpus_tokenizado.cargar_corpus_alineado(os.path.dirname(ruta) or ".", df['post_limpio'])
+        if corpus is not None:
+            print("🧩 Usando el corpus tokenizado de la etapa 01.")
+            df_frec = analizar_frecuencia_por_cluster_corpus(df, corpus)
+        else:
+            df_frec = analizar_frecuencia_por_cluster(df)
 
         # Ofrece opciones de exportación al usuario
         print("\n💾 ¿En qué formato deseas exportar los resultados?")
@@ -49,11 +49,38 @@ def cargar_archivo(ruta):
         print(f"❌ Error al cargar el archivo: {e}")
         return None
 
+# -----------------------------------
+# 🧾 Filtra los posts representativos marcados por el script 03 (columna 'representativo')
+# Devuelve un DataFrame con 'cluster', 'representativo' y 'post_limpio', ordenado por cluster
+# -----------------------------------
+def filtrar_ejemplos(df_clusters):
+    if "representativo" not in df_clusters.columns or "post_limpio" not in df_clusters.columns:
+        return None
+    ejemplos = df_clusters[df_clusters["representativo"].fillna("").astype(str).str.strip() != ""]
+    return ejemplos[["cluster", "representativo", "post_limpio"]].sort_values(["cluster", "representativo"])
+
+# -----------------------------------
+# 📂 Carga los posts representativos desde 3_Cluster_Indicadores.xlsx
+# -----------------------------------
+def cargar_ejemplos(ruta):
+    try:
+        df = pd.read_excel(ruta)
+        df.columns = [col.strip().lower() for col in df.columns]
+        ejemplos = filtrar_ejemplos(df)
+        if ejemplos is None:
+            raise ValueError("El archivo no contiene la columna 'representativo'. Vuelve a ejecutar 03_agrupar_cluster.py.")
+        return ejemplos
+    except Exception as e:
+        reproducir_blip("error")
+        print(f"⚠️ No se pudieron cargar los posts representativos: {e}")
+        return None
+
 # -----------------------------------
 # ✏️ Genera el texto (prompt) para enviar a un modelo de lenguaje (LLM)
 # Se construye agrupando palabras clave por cluster y dando instrucciones específicas
+# Si se pasan 'ejemplos' (posts representativos), se incluyen bajo las palabras de cada cluster
 # -----------------------------------
-def generar_prompt(df):
+def generar_prompt(df, ejemplos=None, max_caracteres=300):
     instrucciones = (
         "Eres un analista de datos experto en comunicación corporativa. Analiza las siguientes listas de palabras clave "
         "y genera una tabla que asigne una temática dominante y los riesgos reputacionales asociados por cada cluster.\n\n"
@@ -64,12 +91,23 @@ def generar_prompt(df):
         "3) Exporta ambas tablas en un archivo de Excel, el cual tendra por nombre 6_LLM_Respuestas, usando una hoja por tabla.\n\n"
         "A continuación, las palabras clave agrupadas por cluster:\n"
     )
+    if ejemplos is not None and not ejemplos.empty:
+        instrucciones = instrucciones.replace(
+            "las palabras clave agrupadas por cluster:",
+            "las palabras clave agrupadas por cluster, junto con posts representativos de cada uno "
+            "(los más cercanos al centro del cluster y otros diversos):")
 
     bloques = []
     # Agrupa las palabras por cluster para construir el cuerpo del prompt
     for cluster, grupo in df.groupby("cluster"):
         palabras = grupo["palabra"].dropna().tolist()
         linea = f"{cluster}:\n{', '.join(palabras)}"
+
+        # Posts representativos del cluster (si están disponibles)
+        if ejemplos is not None:
+            posts = ejemplos.loc[ejemplos["cluster"].astype(str) == str(cluster), "post_limpio"].fillna("").astype(str)
+            if not posts.empty:
+                linea += "\nPosts representativos:\n" + "\n".join(f"- {post[:max_caracteres]}" for post in posts)
         bloques.append(linea)
 
     # Une instrucciones + bloques de palabras agrupadas
@@ -105,8 +143,12 @@ if __name__ == "__main__":
     df = cargar_archivo(ruta)
 
     if df is not None:
+        # Opcionalmente incorpora los posts representativos elegidos en el script 03
+        ruta_ejemplos = input("📂 Ruta de 3_Cluster_Indicadores.xlsx para incluir posts representativos (ENTER para omitir): ")
+        ejemplos = cargar_ejemplos(formatear_ruta(ruta_ejemplos)) if ruta_ejemplos.strip() else None
+
         # Genera el prompt a partir del contenido del archivo
-        prompt = generar_prompt(df)
+        prompt = generar_prompt(df, ejemplos)
 
         # Ofrece al usuario cómo desea visualizar el resultado
         print("\n📝 ¿Cómo deseas visualizar el prompt?")
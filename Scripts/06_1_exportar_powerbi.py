@@ -0,0 +1,165 @@
+import pandas as pd
+import os
+import platform
+import etapas
+
+# Los mapeos de calendario son los mismos que usa la limpieza (etapa 01)
+limpieza = etapas.cargar_etapa("01_limpiar_datos")
+
+# -----------------------------
+# CONFIGURACIÓN GENERAL
+# -----------------------------
+
+# Carpeta (junto al archivo final) donde se escribe el modelo estrella para Power BI
+CARPETA_POWERBI = "powerbi"
+
+# Dimensiones de agregación de la tabla de hechos
+GRANO_HECHOS = ['cluster', 'fecha', 'rango_horario', 'temporada_comercial']
+
+# Métricas de engagement que se suman en la tabla de hechos
+METRICAS = ['facebook_reactions', 'facebook_shares', 'facebook_comments', 'total_interactions']
+
+# -----------------------------
+# 🔊 Emite un sonido si estás en Windows
+# Útil como alerta de éxito o error
+# -----------------------------
+def emitir_blip(tipo="ok"):
+    if platform.system() == "Windows":
+        import winsound
+        if tipo == "error":
+            winsound.MessageBeep(winsound.MB_ICONHAND)
+        else:
+            winsound.MessageBeep()
+
+# -----------------------------
+# 🔧 Limpia y normaliza la ruta ingresada
+# -----------------------------
+def formatear_ruta(ruta_original):
+    return ruta_original.strip().replace('\\', '/').strip('"').strip("'")
+
+# -----------------------------
+# 🧱 Tabla de hechos: posts agregados por cluster × fecha × rango horario × temporada comercial
+# Los ratios se recalculan a partir de las sumas (no se promedian ratios por post)
+# -----------------------------
+def construir_hechos(df):
+    df = df.copy()
+    df['published'] = pd.to_datetime(df['published'], errors='coerce')
+    df = df.dropna(subset=['published'])
+    df['fecha'] = df['published'].dt.normalize()
+
+    for col in METRICAS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0) if col in df.columns else 0
+    for col in ['rango_horario', 'temporada_comercial']:
+        df[col] = df[col].fillna("Desconocido") if col in df.columns else "Desconocido"
+    df['cluster'] = df['cluster'].astype(str).str.strip()
+
+    hechos = df.groupby(GRANO_HECHOS, as_index=False).agg(
+        n_posts=('cluster', 'size'),
+        **{col: (col, 'sum') for col in METRICAS},
+    )
+
+    interacciones = (hechos['facebook_reactions'] + hechos['facebook_shares'] + hechos['facebook_comments']).replace(0, 1)
+    hechos['ratio_reacciones'] = (hechos['facebook_reactions'] / interacciones).round(4)
+    hechos['ratio_comentarios'] = (hechos['facebook_comments'] / interacciones).round(4)
+    hechos['ratio_shares'] = (hechos['facebook_shares'] / interacciones).round(4)
+    hechos['mes'] = hechos['fecha'].dt.strftime('%Y-%m')
+    return hechos
+
+# -----------------------------
+# 🏷️ Dimensión de clusters con la temática y riesgos asignados por el LLM
+# -----------------------------
+def construir_dim_cluster(df):
+    columnas = [col for col in ['cluster', 'tematica', 'riesgos_reputacionales'] if col in df.columns]
+    dim = df[columnas].copy()
+    dim['cluster'] = dim['cluster'].astype(str).str.strip()
+    return dim.drop_duplicates(subset='cluster').sort_values('cluster').reset_index(drop=True)
+
+# -----------------------------
+# 📅 Dimensión calendario continua entre la primera y la última fecha de los hechos
+# -----------------------------
+def construir_dim_calendario(hechos):
+    fechas = pd.date_range(hechos['fecha'].min(), hechos['fecha'].max(), freq='D')
+    return pd.DataFrame({
+        'fecha': fechas,
+        'anio': fechas.year,
+        'mes_num': fechas.month,
+        'mes': fechas.strftime('%Y-%m'),
+        'día_semana': fechas.dayofweek.map(limpieza.dias_dict_con_numero),
+        'tipo_dia': fechas.dayofweek.map(limpieza.tipo_dia_dict),
+        'estacion': fechas.month.map(limpieza.estaciones_dict),
+    })
+
+# -----------------------------
+# 💾 Escribe un CSV solo si su contenido cambió
+# Así Power BI (conector de carpeta) solo relee las particiones nuevas o modificadas
+# -----------------------------
+def escribir_si_cambio(df, ruta):
+    contenido = df.to_csv(index=False, date_format='%Y-%m-%d').encode("utf-8-sig")
+    if os.path.exists(ruta):
+        with open(ruta, "rb") as f:
+            if f.read() == contenido:
+                return False
+    with open(ruta, "wb") as f:
+        f.write(contenido)
+    return True
+
+# -----------------------------
+# 🧠 Función principal: exporta el modelo estrella a partir del DataFrame final (7_Merge_Final)
+# Estructura:
+#   powerbi/dim_cluster.csv
+#   powerbi/dim_calendario.csv
+#   powerbi/hechos/hechos_AAAA-MM.csv  (una partición por mes; se eliminan las de meses que ya no están en los datos)
+# -----------------------------
+def exportar_modelo_powerbi(df, directorio):
+    if 'cluster' not in df.columns or 'published' not in df.columns:
+        raise ValueError("❌ El archivo debe tener las columnas 'cluster' y 'published'.")
+
+    carpeta = os.path.join(directorio, CARPETA_POWERBI)
+    carpeta_hechos = os.path.join(carpeta, "hechos")
+    os.makedirs(carpeta_hechos, exist_ok=True)
+
+    hechos = construir_hechos(df)
+    escritos = []
+    sin_cambios = 0
+
+    for nombre, tabla in [("dim_cluster.csv", construir_dim_cluster(df)),
+                          ("dim_calendario.csv", construir_dim_calendario(hechos))]:
+        if escribir_si_cambio(tabla, os.path.join(carpeta, nombre)):
+            escritos.append(nombre)
+        else:
+            sin_cambios += 1
+
+    vigentes = set()
+    for mes, particion in hechos.groupby('mes'):
+        nombre = f"hechos_{mes}.csv"
+        vigentes.add(nombre)
+        if escribir_si_cambio(particion.drop(columns='mes'), os.path.join(carpeta_hechos, nombre)):
+            escritos.append(os.path.join("hechos", nombre))
+        else:
+            sin_cambios += 1
+
+    # Particiones de meses que ya no aparecen en los datos (Power BI las seguiría leyendo)
+    eliminados = []
+    for nombre in sorted(os.listdir(carpeta_hechos)):
+        if nombre.startswith("hechos_") and nombre.endswith(".csv") and nombre not in vigentes:
+            os.remove(os.path.join(carpeta_hechos, nombre))
+            eliminados.append(os.path.join("hechos", nombre))
+
+    print(f"📦 {len(df)} posts resumidos en {len(hechos)} filas de hechos ({hechos['mes'].nunique()} particiones mensuales).")
+    print(f"📝 Archivos actualizados: {len(escritos)} | sin cambios: {sin_cambios} | particiones eliminadas: {len(eliminados)}")
+    return carpeta, escritos
+
+# -----------------------------
+# ▶️ EJECUCIÓN DEL SCRIPT
+# -----------------------------
+if __name__ == "__main__":
+    try:
+        ruta = formatear_ruta(input("📂 Ingresa la ruta del archivo final (7_Merge_Final.xlsx): "))
+        df_final = pd.read_excel(ruta)
+        carpeta, _ = exportar_modelo_powerbi(df_final, os.path.dirname(ruta))
+
+        emitir_blip("ok")
+        print(f"\n✅ Modelo para Power BI exportado en:\n📁 {carpeta}")
+    except Exception as e:
+        emitir_blip("error")
+        print(f"\n❌ Error durante la exportación: {e}")
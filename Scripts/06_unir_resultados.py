@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 import platform
+import etapas
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
 
@@ -38,6 +39,7 @@ def generar_nombre_unico(ruta_base):
 # -----------------------------
 # 🧠 Función principal: une el archivo del pipeline con el archivo generado por el modelo de lenguaje (LLM)
 # Añade columnas 'tematica' y 'riesgos_reputacionales' según el cluster
+# Devuelve el DataFrame final y su ruta (o None si ocurre un error)
 # -----------------------------
 def insertar_columnas_y_merge():
     try:
@@ -125,13 +127,26 @@ def insertar_columnas_y_merge():
 
         emitir_blip("ok")
         print(f"\n✅ Archivo generado con columnas de temática y riesgos:\n📁 {ruta_final}")
+        return df_pipeline, ruta_final
 
     except Exception as e:
         emitir_blip("error")
         print(f"\n❌ Error durante el proceso: {e}")
+        return None
 
 # -----------------------------
 # ▶️ EJECUCIÓN DEL SCRIPT
 # -----------------------------
 if __name__ == "__main__":
-    insertar_columnas_y_merge()
\ No newline at end of file
+    resultado = insertar_columnas_y_merge()
+
+    # Exportación opcional del modelo estrella pre-agregado para Power BI (ver 06_1_exportar_powerbi.py)
+    if resultado is not None and input("\n📊 ¿Exportar también el modelo para Power BI? (s/n): ").strip().lower() == "s":
+        df_final, ruta_final = resultado
+        try:
+            exportador = etapas.cargar_etapa("06_1_exportar_powerbi")
+            carpeta, _ = exportador.exportar_modelo_powerbi(df_final, os.path.dirname(ruta_final))
+            print(f"✅ Modelo para Power BI exportado en:\n📁 {carpeta}")
+        except Exception as e:
+            emitir_blip("error")
+            print(f"\n❌ Error al exportar el modelo para Power BI: {e}")
\ No newline at end of file
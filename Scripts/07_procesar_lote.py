@@ -0,0 +1,241 @@
+# -----------------------------------------------
+# 07_procesar_lote.py
+# Procesa varios exports (por retailer, por mes, etc.) de una sola vez con la cadena 01 → 05
+# - Limpieza (01) y keywords (02, 04, 05) se ejecutan en paralelo en un pool de procesos
+# - Los embeddings (03) pasan por un único modelo cargado una sola vez en el proceso principal
+# Uso: Ejecutar después de descargar los recursos NLTK. El paso 06 sigue siendo manual (requiere la respuesta del LLM)
+# -----------------------------------------------
+
+# Presupuesto total de hilos (PIPELINE_HILOS); procesar_lote lo reparte luego entre el pool y los embeddings
+import presupuesto_hilos
+presupuesto_hilos.configurar_entorno()
+
+import glob
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import etapas
+
+# El script 03 se carga solo en el proceso principal para no cargar torch en cada proceso del pool
+limpieza = etapas.cargar_etapa("01_limpiar_datos")
+keywords_post = etapas.cargar_etapa("02_extraer_keywords_post")
+keywords_cluster = etapas.cargar_etapa("04_extraer_keywords_cluster")
+prompts = etapas.cargar_etapa("05_generar_prompts")
+
+# Carpeta (dentro de la carpeta de entrada) donde se crea un subdirectorio de resultados por archivo
+CARPETA_RESULTADOS = "lote_resultados"
+
+# Función para emitir sonidos en Windows como retroalimentación al usuario
+def emitir_blip(tipo="info"):
+    if platform.system() == "Windows":
+        import winsound
+        if tipo == "error":
+            winsound.MessageBeep(winsound.MB_ICONHAND)
+        else:
+            winsound.MessageBeep()
+
+# Limpia y normaliza una ruta ingresada por el usuario
+def formatear_ruta(ruta_original):
+    return ruta_original.strip().replace('\\', '/').strip('"').strip("'")
+
+# Resuelve la entrada del usuario: una carpeta (toma todos sus .xlsx) o un patrón glob
+def listar_archivos(entrada):
+    if os.path.isdir(entrada):
+        patron = os.path.join(entrada, "*.xlsx")
+    else:
+        patron = entrada
+    # Ignora archivos temporales de Excel (~$archivo.xlsx) y los resultados de lotes anteriores
+    return sorted(ruta for ruta in glob.glob(patron)
+                  if not os.path.basename(ruta).startswith("~$")
+                  and CARPETA_RESULTADOS not in os.path.normpath(ruta).split(os.sep))
+
+# Carpeta común a todos los archivos del lote
+def carpeta_comun(rutas):
+    return os.path.commonpath([os.path.dirname(os.path.abspath(ruta)) for ruta in rutas])
+
+# Subdirectorio de resultados único por archivo: ruta relativa a la carpeta común, sin extensión
+# (por ejemplo retailer_a/2024-01.xlsx → retailer_a_2024-01); si aun así se repite, se agrega un sufijo numérico
+def directorios_salida(rutas, carpeta_salida):
+    base = carpeta_comun(rutas)
+    directorios = {}
+    usados = set()
+    for ruta in rutas:
+        relativa = os.path.splitext(os.path.relpath(os.path.abspath(ruta), base))[0]
+        nombre = relativa.replace(os.sep, "_").replace("/", "_")
+        candidato, contador = nombre, 1
+        while candidato.lower() in usados:
+            candidato = f"{nombre}_{contador}"
+            contador += 1
+        usados.add(candidato.lower())
+        directorios[ruta] = os.path.join(carpeta_salida, candidato)
+    return directorios
+
+# Etapas 01 y 02 para un archivo (se ejecuta dentro de un proceso del pool)
+# 'post_limpio' se tokeniza una sola vez; el corpus se reutiliza en la etapa 04
+def procesar_etapas_texto(ruta, directorio_salida):
+    tiempos = {}
+    os.makedirs(directorio_salida, exist_ok=True)
+
+    inicio = time.perf_counter()
+    df = pd.read_excel(ruta)
+    df = limpieza.limpiar_dataframe(df)
+    ruta_limpio = limpieza.exportar_dataset_limpio(df, directorio_salida)
+    corpus = limpieza.exportar_corpus_tokenizado(df, directorio_salida)
+    tiempos['01_limpieza_s'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados = keywords_post.contar_palabras_corpus(corpus, top_n=50)
+    keywords_post.exportar_resultados(resultados, ruta_limpio, "excel")
+    tiempos['02_keywords_post_s'] = time.perf_counter() - inicio
+
+    return df, corpus, tiempos
+
+# Etapas 04 y 05 para un archivo ya agrupado (se ejecuta dentro de un proceso del pool)
+def procesar_etapas_cluster(df, corpus, directorio_salida):
+    tiempos = {}
+    ruta_base = os.path.join(directorio_salida, "3_Cluster_Indicadores.xlsx")
+
+    inicio = time.perf_counter()
+    df['post_limpio'] = df['post_limpio'].fillna('')
+    df_frec = keywords_cluster.analizar_frecuencia_por_cluster_corpus(df, corpus)
+    keywords_cluster.exportar_resultados(df_frec, ruta_base, "excel")
+    tiempos['04_keywords_cluster_s'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    prompts.guardar_prompt(prompts.generar_prompt(df_frec, prompts.filtrar_ejemplos(df)), ruta_base)
+    tiempos['05_prompt_s'] = time.perf_counter() - inicio
+
+    return tiempos
+
+# Etapa 03 en el proceso principal usando el modelo compartido
+def procesar_etapa_embeddings(agrupamiento, modelo, df, directorio_salida):
+    inicio = time.perf_counter()
+    df = agrupamiento.normalizar_columnas(df)
+    df = agrupamiento.generar_clusters(df, directorio_indice=directorio_salida, modelo=modelo)
+    df = agrupamiento.calcular_metricas_engagement(df)
+    ruta_salida = agrupamiento.generar_nombre_unico(os.path.join(directorio_salida, "3_Cluster_Indicadores.xlsx"))
+    df.to_excel(ruta_salida, index=False)
+    return df, {'03_clusters_s': time.perf_counter() - inicio}
+
+# Número de procesos por defecto: uno por archivo, sin superar la mitad del presupuesto de hilos
+def procesos_por_defecto(n_archivos):
+    return max(1, min(n_archivos, presupuesto_hilos.obtener_presupuesto() // 2))
+
+# Orquesta el lote completo y devuelve un DataFrame con el tiempo por archivo y por etapa
+# El presupuesto de hilos se reparte entre los procesos del pool y el proceso principal (embeddings)
+def procesar_lote(rutas, carpeta_salida, n_procesos=None):
+    n_procesos = n_procesos or procesos_por_defecto(len(rutas))
+    total_hilos = presupuesto_hilos.obtener_presupuesto()
+
+    # Cada proceso usa al menos 1 hilo y el principal otro más: más procesos superarían el presupuesto
+    max_procesos = max(1, total_hilos - 1)
+    if n_procesos > max_procesos:
+        print(f"⚠️ {n_procesos} procesos superan el presupuesto de {total_hilos} hilos; se usarán {max_procesos}.")
+        n_procesos = max_procesos
+    hilos_trabajador = presupuesto_hilos.presupuesto_por_trabajador(n_procesos + 1, total_hilos)
+    hilos_principal = max(1, total_hilos - n_procesos * hilos_trabajador)
+    print(f"🧵 Presupuesto de {total_hilos} hilos: {n_procesos} procesos × {hilos_trabajador} + {hilos_principal} para embeddings.")
+
+    presupuesto_hilos.configurar_entorno(hilos_principal)
+    agrupamiento = etapas.cargar_etapa("03_agrupar_cluster")
+    presupuesto_hilos.limitar_librerias(hilos_principal)
+
+    inicio_lote = time.perf_counter()
+    print("🔄 Cargando modelo de embeddings (una sola vez para todo el lote)...")
+    modelo = agrupamiento.cargar_modelo()
+    carga_modelo_s = time.perf_counter() - inicio_lote
+
+    directorios = directorios_salida(rutas, carpeta_salida)
+    resumen = {
+        ruta: {
+            'archivo': os.path.relpath(os.path.abspath(ruta), carpeta_comun(rutas)),
+            'directorio_salida': directorios[ruta],
+            'estado': 'pendiente',
+        }
+        for ruta in rutas
+    }
+
+    with ProcessPoolExecutor(max_workers=n_procesos, initializer=presupuesto_hilos.inicializar_trabajador,
+                             initargs=(hilos_trabajador,)) as pool:
+        # Etapas 01-02 de todos los archivos en paralelo
+        futuros_texto = {
+            pool.submit(procesar_etapas_texto, ruta, resumen[ruta]['directorio_salida']): ruta
+            for ruta in rutas
+        }
+        futuros_cluster = {}
+
+        # A medida que cada archivo termina su limpieza, se embebe con el modelo compartido
+        # mientras el pool sigue limpiando los archivos restantes
+        for futuro in as_completed(futuros_texto):
+            ruta = futuros_texto[futuro]
+            fila = resumen[ruta]
+            try:
+                df, corpus, tiempos = futuro.result()
+                fila.update(tiempos)
+                fila['filas'] = len(df)
+
+                df, tiempos = procesar_etapa_embeddings(agrupamiento, modelo, df, fila['directorio_salida'])
+                fila.update(tiempos)
+
+                futuros_cluster[pool.submit(procesar_etapas_cluster, df, corpus, fila['directorio_salida'])] = ruta
+                print(f"✅ {fila['archivo']}: limpieza y clusters listos.")
+            except Exception as e:
+                fila['estado'] = f"error: {e}"
+                print(f"🚨 {fila['archivo']}: {e}")
+
+        for futuro in as_completed(futuros_cluster):
+            fila = resumen[futuros_cluster[futuro]]
+            try:
+                fila.update(futuro.result())
+                fila['estado'] = 'ok'
+            except Exception as e:
+                fila['estado'] = f"error: {e}"
+                print(f"🚨 {fila['archivo']}: {e}")
+
+    df_resumen = pd.DataFrame(list(resumen.values()))
+    columnas_tiempo = [col for col in df_resumen.columns if col.endswith('_s')]
+    df_resumen['total_s'] = df_resumen[columnas_tiempo].sum(axis=1)
+    df_resumen[columnas_tiempo + ['total_s']] = df_resumen[columnas_tiempo + ['total_s']].round(2)
+
+    print(f"\n⏱️ Modelo cargado en {carga_modelo_s:.1f} s. Lote completo en {time.perf_counter() - inicio_lote:.1f} s.")
+    return df_resumen
+
+# -------------------------------
+# MAIN (bloque principal del programa)
+# -------------------------------
+if __name__ == "__main__":
+    try:
+        entrada = input("📂 Ingresa una carpeta o un patrón (ej. C:/data/*_2024_*.xlsx) con los exports a procesar: ")
+        entrada = formatear_ruta(entrada)
+        rutas = listar_archivos(entrada)
+
+        if not rutas:
+            raise FileNotFoundError("❌ No se encontraron archivos .xlsx para procesar.")
+
+        print(f"✅ {len(rutas)} archivos encontrados.")
+        n_procesos = input(f"⚙️ ¿Cuántos procesos en paralelo? (ENTER = {procesos_por_defecto(len(rutas))}): ").strip()
+        n_procesos = int(n_procesos) if n_procesos.isdigit() and int(n_procesos) > 0 else None
+
+        carpeta_base = entrada if os.path.isdir(entrada) else carpeta_comun(rutas)
+        carpeta_salida = os.path.join(carpeta_base, CARPETA_RESULTADOS)
+        os.makedirs(carpeta_salida, exist_ok=True)
+
+        df_resumen = procesar_lote(rutas, carpeta_salida, n_procesos)
+
+        ruta_resumen = os.path.join(carpeta_salida, "Resumen_Lote.xlsx")
+        df_resumen.to_excel(ruta_resumen, index=False)
+
+        print("\n📊 RESUMEN DEL LOTE")
+        print(df_resumen[['archivo', 'estado', 'total_s']].to_string(index=False))
+        print(f"\n✅ Resumen exportado en:\n📁 {ruta_resumen}")
+        emitir_blip("info")
+
+    except Exception as e:
+        emitir_blip("error")
+        print(f"\n🚨 Error inesperado: {e}")
+
+    input("\nPresiona ENTER para salir...")
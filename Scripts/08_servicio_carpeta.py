@@ -0,0 +1,258 @@
+# -----------------------------------------------
+# 08_servicio_carpeta.py
+# Servicio de larga duración que vigila una carpeta y procesa cada export nuevo apenas llega
+# - El modelo de embeddings y los centroides del script 03 se cargan una sola vez y quedan en memoria
+# - Cada archivo se limpia (01), se embebe, se asigna al cluster más cercano (03) y se agrega al dataset de salida
+# - Una cola acotada controla la carga: si está llena, la vigilancia se detiene hasta que haya espacio
+# Uso: Ejecutar después de 03_agrupar_cluster.py (requiere 3_Centroides.npy). Detener con Ctrl+C
+# -----------------------------------------------
+
+# Hilos para torch y BLAS según PIPELINE_HILOS; el servicio los reparte después entre sus trabajadores
+import presupuesto_hilos
+presupuesto_hilos.configurar_entorno()
+
+import os
+import platform
+import queue
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+import etapas
+
+limpieza = etapas.cargar_etapa("01_limpiar_datos")
+agrupamiento = etapas.cargar_etapa("03_agrupar_cluster")
+
+# -------------------------------
+# CONFIGURACIÓN GENERAL
+# -------------------------------
+
+# Segundos entre cada revisión de la carpeta vigilada
+INTERVALO_REVISION = 5
+
+# Capacidad máxima de la cola de trabajo (archivos detectados pendientes de procesar)
+TAM_COLA = 8
+
+# Número de hilos que procesan archivos en paralelo (comparten el mismo modelo en memoria)
+N_TRABAJADORES = 1
+
+# Extensiones aceptadas en la carpeta vigilada
+EXTENSIONES = (".xlsx", ".csv")
+
+# Subcarpetas donde se mueven los archivos ya procesados o con error
+CARPETA_PROCESADOS = "procesados"
+CARPETA_ERRORES = "errores"
+
+# Dataset acumulado (CSV para poder agregar filas sin reescribir el archivo completo)
+ARCHIVO_SALIDA = "8_Dataset_Continuo.csv"
+
+# Archivos generados por el propio pipeline: nunca se tratan como exports nuevos
+PREFIJOS_ARTEFACTOS = ("1_Dataset_Limpio", "2_keywords_por_post", "3_Cluster_Indicadores", "3_Embeddings",
+                       "4_Top_Words_Cluster", "4_1_", "4_2_", "6_LLM_Respuestas", "7_Merge_Final", "8_", "10_Vista_Previa")
+
+# Función para emitir sonidos en Windows como retroalimentación al usuario
+def emitir_blip(tipo="info"):
+    if platform.system() == "Windows":
+        import winsound
+        if tipo == "error":
+            winsound.MessageBeep(winsound.MB_ICONHAND)
+        else:
+            winsound.MessageBeep()
+
+# Limpia y normaliza una ruta ingresada por el usuario
+def formatear_ruta(ruta_original):
+    return ruta_original.strip().replace('\\', '/').strip('"').strip("'")
+
+# Mueve un archivo a una subcarpeta sin sobrescribir otro con el mismo nombre
+def mover_archivo(ruta, subcarpeta):
+    destino_dir = os.path.join(os.path.dirname(ruta), subcarpeta)
+    os.makedirs(destino_dir, exist_ok=True)
+    nombre, extension = os.path.splitext(os.path.basename(ruta))
+    destino = os.path.join(destino_dir, nombre + extension)
+    contador = 1
+    while os.path.exists(destino):
+        destino = os.path.join(destino_dir, f"{nombre}_{contador}{extension}")
+        contador += 1
+    shutil.move(ruta, destino)
+    return destino
+
+# Indica si un archivo de la carpeta vigilada es un artefacto del pipeline (o un temporal de Excel)
+def es_artefacto(nombre):
+    return nombre == ARCHIVO_SALIDA or nombre.startswith("~$") or nombre.startswith(PREFIJOS_ARTEFACTOS)
+
+
+class ServicioCarpeta:
+    """
+    Vigila 'carpeta_entrada' y procesa cada archivo nuevo con el modelo y los centroides ya cargados.
+    Un hilo vigilante alimenta una cola acotada; uno o más hilos trabajadores la consumen.
+    """
+
+    def __init__(self, carpeta_entrada, directorio_estado, ruta_salida,
+                 tam_cola=TAM_COLA, n_trabajadores=N_TRABAJADORES, intervalo=INTERVALO_REVISION):
+        # El estado del script 03 y el dataset acumulado no pueden vivir en la carpeta vigilada
+        carpeta_real = os.path.realpath(carpeta_entrada)
+        if carpeta_real in (os.path.realpath(directorio_estado), os.path.realpath(os.path.dirname(ruta_salida) or ".")):
+            raise ValueError("❌ La carpeta vigilada debe ser distinta de la carpeta de estado y de salida.")
+
+        self.carpeta_entrada = carpeta_entrada
+        self.ruta_salida = ruta_salida
+        self.intervalo = intervalo
+        self.n_trabajadores = n_trabajadores
+
+        print("🔄 Cargando modelo de embeddings y centroides (una sola vez)...")
+        self.modelo = agrupamiento.cargar_modelo()
+        self.centroides = agrupamiento.cargar_centroides(directorio_estado)
+        self.proyeccion = agrupamiento.cargar_proyeccion(directorio_estado)
+
+        # Los hilos trabajadores comparten el proceso: el presupuesto de hilos se reparte entre ellos
+        presupuesto_hilos.limitar_librerias(presupuesto_hilos.presupuesto_por_trabajador(n_trabajadores))
+
+        self.cola = queue.Queue(maxsize=tam_cola)
+        self.detener = threading.Event()
+        self.candado_salida = threading.Lock()
+        # Archivos ya encolados o en proceso (evita encolarlos dos veces)
+        self.en_curso = set()
+        self.candado_en_curso = threading.Lock()
+        # Archivos que no se pudieron mover tras procesarse: se ignoran para no reprocesarlos indefinidamente
+        self.fallidos = set()
+        # Tamaño observado en la revisión anterior (un archivo se procesa solo cuando deja de crecer)
+        self.tamanos_previos = {}
+
+    # Devuelve los archivos nuevos cuyo tamaño no cambió desde la revisión anterior (escritura terminada)
+    def detectar_archivos_listos(self):
+        listos = []
+        tamanos_actuales = {}
+        with os.scandir(self.carpeta_entrada) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file() or not entrada.name.lower().endswith(EXTENSIONES):
+                    continue
+                if es_artefacto(entrada.name):
+                    continue
+                with self.candado_en_curso:
+                    if entrada.path in self.en_curso or entrada.path in self.fallidos:
+                        continue
+                tamano = entrada.stat().st_size
+                tamanos_actuales[entrada.path] = tamano
+                if self.tamanos_previos.get(entrada.path) == tamano:
+                    listos.append(entrada.path)
+        self.tamanos_previos = tamanos_actuales
+        return sorted(listos)
+
+    # Hilo vigilante: encola archivos listos; si la cola está llena espera (backpressure)
+    def vigilar(self):
+        while not self.detener.is_set():
+            for ruta in self.detectar_archivos_listos():
+                with self.candado_en_curso:
+                    self.en_curso.add(ruta)
+                avisado = False
+                while not self.detener.is_set():
+                    try:
+                        self.cola.put(ruta, timeout=1)
+                        break
+                    except queue.Full:
+                        if not avisado:
+                            print(f"⏳ Cola llena ({self.cola.maxsize}). Esperando para encolar {os.path.basename(ruta)}...")
+                            avisado = True
+            self.detener.wait(self.intervalo)
+
+    # Limpia, embebe, asigna clusters y calcula engagement para un archivo
+    def procesar_archivo(self, ruta):
+        if ruta.lower().endswith(".csv"):
+            df = pd.read_csv(ruta)
+        else:
+            df = pd.read_excel(ruta)
+
+        df = limpieza.limpiar_dataframe(df)
+        df = agrupamiento.normalizar_columnas(df)
+
+        embeddings = self.modelo.encode(df['post_limpio'].fillna('').tolist(), show_progress_bar=False)
+        df['cluster'] = agrupamiento.asignar_clusters(embeddings, self.centroides, self.proyeccion)
+        df = agrupamiento.calcular_metricas_engagement(df)
+        df.insert(0, 'archivo_origen', os.path.basename(ruta))
+        return df
+
+    # Agrega filas al dataset de salida respetando las columnas ya existentes en el archivo
+    def agregar_a_salida(self, df):
+        with self.candado_salida:
+            if os.path.exists(self.ruta_salida):
+                columnas = pd.read_csv(self.ruta_salida, nrows=0, encoding="utf-8-sig").columns
+                df.reindex(columns=columnas).to_csv(self.ruta_salida, mode='a', header=False, index=False, encoding="utf-8")
+            else:
+                df.to_csv(self.ruta_salida, index=False, encoding="utf-8-sig")
+
+    # Mueve un archivo ya atendido; si no se puede, lo marca como fallido para no volver a encolarlo
+    def retirar_archivo(self, ruta, subcarpeta):
+        try:
+            mover_archivo(ruta, subcarpeta)
+        except OSError as e:
+            with self.candado_en_curso:
+                self.fallidos.add(ruta)
+            print(f"⚠️ No se pudo mover {os.path.basename(ruta)} a '{subcarpeta}' ({e}); se ignorará hasta reiniciar el servicio.")
+
+    # Hilo trabajador: consume la cola hasta que se solicite detener el servicio
+    def trabajar(self):
+        while True:
+            ruta = self.cola.get()
+            if ruta is None:
+                self.cola.task_done()
+                break
+            try:
+                inicio = time.perf_counter()
+                df = self.procesar_archivo(ruta)
+                self.agregar_a_salida(df)
+                self.retirar_archivo(ruta, CARPETA_PROCESADOS)
+                duracion = time.perf_counter() - inicio
+                print(f"✅ {os.path.basename(ruta)}: {len(df)} posts agregados en {duracion:.1f} s (en cola: {self.cola.qsize()}).")
+                emitir_blip("info")
+            except Exception as e:
+                emitir_blip("error")
+                print(f"🚨 Error al procesar {os.path.basename(ruta)}: {e}")
+                self.retirar_archivo(ruta, CARPETA_ERRORES)
+            finally:
+                with self.candado_en_curso:
+                    self.en_curso.discard(ruta)
+                self.cola.task_done()
+
+    # Inicia los hilos y bloquea hasta Ctrl+C; al salir termina los archivos ya encolados
+    def ejecutar(self):
+        trabajadores = [threading.Thread(target=self.trabajar, daemon=True) for _ in range(self.n_trabajadores)]
+        for hilo in trabajadores:
+            hilo.start()
+        vigilante = threading.Thread(target=self.vigilar, daemon=True)
+        vigilante.start()
+
+        print(f"👀 Vigilando {self.carpeta_entrada} cada {self.intervalo} s. Presiona Ctrl+C para detener.")
+        try:
+            while vigilante.is_alive():
+                vigilante.join(timeout=1)
+        except KeyboardInterrupt:
+            print("\n🛑 Deteniendo servicio. Terminando archivos en cola...")
+        finally:
+            self.detener.set()
+            vigilante.join()
+            for _ in trabajadores:
+                self.cola.put(None)
+            for hilo in trabajadores:
+                hilo.join()
+
+# -------------------------------
+# MAIN (bloque principal del programa)
+# -------------------------------
+if __name__ == "__main__":
+    try:
+        carpeta_entrada = formatear_ruta(input("📂 Ingresa la carpeta a vigilar (donde llegan los exports): "))
+        if not os.path.isdir(carpeta_entrada):
+            raise FileNotFoundError("❌ La carpeta a vigilar no existe.")
+
+        directorio_estado = formatear_ruta(input("📂 Ingresa la carpeta con el estado del script 03 (3_Centroides.npy): ")) or "."
+        ruta_salida = os.path.join(directorio_estado, ARCHIVO_SALIDA)
+
+        servicio = ServicioCarpeta(carpeta_entrada, directorio_estado, ruta_salida)
+        servicio.ejecutar()
+        print(f"\n✅ Dataset acumulado en:\n📁 {ruta_salida}")
+
+    except Exception as e:
+        emitir_blip("error")
+        print(f"\n🚨 Error inesperado: {e}")
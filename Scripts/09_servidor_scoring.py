@@ -0,0 +1,260 @@
+# -----------------------------------------------
+# 09_servidor_scoring.py
+# Servidor HTTP local (solo librería estándar + asyncio) para clasificar posts en tiempo real
+# - POST /clasificar  → texto limpio, cluster y ratios de engagement de un post
+# - GET  /metricas    → latencias p50/p99 y tamaños de micro-lote
+# Las solicitudes concurrentes se agrupan en micro-lotes (tamaño máximo + espera máxima)
+# para que cada llamada a 'encode' procese varios textos a la vez
+# Uso: Ejecutar después de 03_agrupar_cluster.py (requiere 3_Centroides.npy)
+# -----------------------------------------------
+
+# Hilos para torch (inferencia por micro-lotes) según PIPELINE_HILOS; antes de importar torch/numpy
+import presupuesto_hilos
+presupuesto_hilos.configurar_entorno()
+
+import asyncio
+import json
+import os
+import platform
+import time
+from collections import Counter, deque
+
+import pandas as pd
+
+import etapas
+
+limpieza = etapas.cargar_etapa("01_limpiar_datos")
+agrupamiento = etapas.cargar_etapa("03_agrupar_cluster")
+
+# -------------------------------
+# CONFIGURACIÓN GENERAL
+# -------------------------------
+
+HOST = "127.0.0.1"
+PUERTO = 8765
+
+# Máximo de posts por llamada a 'encode'
+MAX_LOTE = 32
+
+# Máximo tiempo (en milisegundos) que se espera a completar un lote antes de procesarlo
+MAX_ESPERA_MS = 5
+
+# Número de latencias recientes usadas para calcular p50/p99
+VENTANA_METRICAS = 10000
+
+# Columnas de interacción aceptadas en el cuerpo de la solicitud
+COLUMNAS_ENGAGEMENT = ['facebook_reactions', 'facebook_shares', 'facebook_comments', 'total_interactions']
+
+# Función para emitir sonidos en Windows como retroalimentación al usuario
+def emitir_blip(tipo="info"):
+    if platform.system() == "Windows":
+        import winsound
+        if tipo == "error":
+            winsound.MessageBeep(winsound.MB_ICONHAND)
+        else:
+            winsound.MessageBeep()
+
+# Limpia y normaliza una ruta ingresada por el usuario
+def formatear_ruta(ruta_original):
+    return ruta_original.strip().replace('\\', '/').strip('"').strip("'")
+
+# Percentil simple sobre una lista ya ordenada (sin interpolación)
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return None
+    indice = min(len(valores_ordenados) - 1, int(round(p / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[indice]
+
+
+class ClasificadorMicroLotes:
+    """
+    Agrupa solicitudes concurrentes en micro-lotes y las procesa con el modelo y los centroides en memoria.
+    Cada solicitud recibe su propio resultado a través de un Future.
+    """
+
+    def __init__(self, modelo, centroides, proyeccion=None, max_lote=MAX_LOTE, max_espera_ms=MAX_ESPERA_MS):
+        self.modelo = modelo
+        self.centroides = centroides
+        self.proyeccion = proyeccion
+        self.max_lote = max_lote
+        self.max_espera = max_espera_ms / 1000
+        self.cola = asyncio.Queue()
+        self.latencias_ms = deque(maxlen=VENTANA_METRICAS)
+        self.tamanos_lote = Counter()
+        self.total_solicitudes = 0
+
+    # Encola un post y espera su resultado
+    async def clasificar(self, datos):
+        inicio = time.perf_counter()
+        futuro = asyncio.get_running_loop().create_future()
+        await self.cola.put((datos, futuro))
+        resultado = await futuro
+        self.latencias_ms.append((time.perf_counter() - inicio) * 1000)
+        self.total_solicitudes += 1
+        return resultado
+
+    # Junta hasta 'max_lote' solicitudes o lo que llegue dentro de 'max_espera'
+    async def juntar_lote(self):
+        lote = [await self.cola.get()]
+        limite = time.perf_counter() + self.max_espera
+        while len(lote) < self.max_lote:
+            restante = limite - time.perf_counter()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(self.cola.get(), timeout=restante))
+            except asyncio.TimeoutError:
+                break
+        return lote
+
+    # Procesa un lote completo (se ejecuta fuera del event loop para no bloquear las conexiones)
+    def procesar_lote(self, lista_datos):
+        df = pd.DataFrame(lista_datos)
+        if 'post' not in df.columns:
+            df['post'] = ""
+        df['post_limpio'] = df['post'].apply(limpieza.limpiar_texto_avanzado)
+
+        embeddings = self.modelo.encode(df['post_limpio'].tolist(), show_progress_bar=False)
+        df['cluster'] = agrupamiento.asignar_clusters(embeddings, self.centroides, self.proyeccion)
+
+        for col in COLUMNAS_ENGAGEMENT:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0) if col in df.columns else 0
+        # Sin mensajes en consola: se ejecuta en cada micro-lote
+        df = agrupamiento.calcular_metricas_engagement(df, verbose=False)
+
+        columnas = ['post_limpio', 'cluster', 'ratio_reacciones', 'ratio_comentarios', 'ratio_shares']
+        return df[columnas].to_dict(orient='records')
+
+    # Bucle permanente: junta un lote, lo procesa y entrega cada resultado a su solicitud
+    async def ejecutar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = await self.juntar_lote()
+            self.tamanos_lote[len(lote)] += 1
+            try:
+                resultados = await loop.run_in_executor(None, self.procesar_lote, [datos for datos, _ in lote])
+                for (_, futuro), resultado in zip(lote, resultados):
+                    if not futuro.done():
+                        futuro.set_result(resultado)
+            except Exception as e:
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+
+    # Resumen de latencias y tamaños de lote para el endpoint /metricas
+    def metricas(self):
+        latencias = sorted(self.latencias_ms)
+        n_lotes = sum(self.tamanos_lote.values())
+        return {
+            'solicitudes': self.total_solicitudes,
+            'latencia_p50_ms': percentil(latencias, 50),
+            'latencia_p99_ms': percentil(latencias, 99),
+            'lotes': n_lotes,
+            'tamano_lote_promedio': (sum(t * n for t, n in self.tamanos_lote.items()) / n_lotes) if n_lotes else None,
+            'histograma_tamano_lote': {str(t): n for t, n in sorted(self.tamanos_lote.items())},
+        }
+
+# Escribe una respuesta HTTP/1.1 con cuerpo JSON
+def escribir_respuesta(writer, estado, cuerpo, mantener_conexion):
+    textos_estado = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+    datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+    cabeceras = (
+        f"HTTP/1.1 {estado} {textos_estado.get(estado, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(datos)}\r\n"
+        f"Connection: {'keep-alive' if mantener_conexion else 'close'}\r\n\r\n"
+    )
+    writer.write(cabeceras.encode("latin-1") + datos)
+
+# Atiende una conexión (admite keep-alive para varias solicitudes seguidas)
+async def atender_conexion(clasificador, reader, writer):
+    try:
+        while True:
+            linea = await reader.readline()
+            if not linea:
+                break
+            partes = linea.decode("latin-1").split()
+            if len(partes) < 2:
+                break
+            metodo, ruta = partes[0].upper(), partes[1]
+
+            cabeceras = {}
+            while True:
+                cabecera = await reader.readline()
+                if cabecera in (b"\r\n", b"\n", b""):
+                    break
+                nombre, _, valor = cabecera.decode("latin-1").partition(":")
+                cabeceras[nombre.strip().lower()] = valor.strip()
+
+            # Con un Content-Length inválido no se puede delimitar el cuerpo: se responde 400 y se cierra la conexión
+            try:
+                longitud = int(cabeceras.get("content-length", 0) or 0)
+                if longitud < 0:
+                    raise ValueError
+            except ValueError:
+                escribir_respuesta(writer, 400, {'error': "Content-Length inválido."}, False)
+                await writer.drain()
+                break
+            cuerpo = await reader.readexactly(longitud) if longitud else b""
+            mantener_conexion = cabeceras.get("connection", "").lower() != "close"
+
+            if metodo == "POST" and ruta == "/clasificar":
+                try:
+                    datos = json.loads(cuerpo or b"{}")
+                    if not isinstance(datos, dict):
+                        raise ValueError("El cuerpo debe ser un objeto JSON.")
+                except ValueError as e:
+                    escribir_respuesta(writer, 400, {'error': str(e)}, mantener_conexion)
+                else:
+                    try:
+                        resultado = await clasificador.clasificar(datos)
+                        escribir_respuesta(writer, 200, resultado, mantener_conexion)
+                    except Exception as e:
+                        escribir_respuesta(writer, 500, {'error': str(e)}, mantener_conexion)
+            elif metodo == "GET" and ruta == "/metricas":
+                escribir_respuesta(writer, 200, clasificador.metricas(), mantener_conexion)
+            else:
+                escribir_respuesta(writer, 404, {'error': f"Ruta no encontrada: {metodo} {ruta}"}, mantener_conexion)
+
+            await writer.drain()
+            if not mantener_conexion:
+                break
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+# Carga modelo y centroides, y levanta el servidor
+async def iniciar_servidor(directorio_estado, host=HOST, puerto=PUERTO):
+    print("🔄 Cargando modelo de embeddings y centroides (una sola vez)...")
+    clasificador = ClasificadorMicroLotes(
+        agrupamiento.cargar_modelo(),
+        agrupamiento.cargar_centroides(directorio_estado),
+        agrupamiento.cargar_proyeccion(directorio_estado),
+    )
+
+    tarea_lotes = asyncio.create_task(clasificador.ejecutar())
+    servidor = await asyncio.start_server(lambda r, w: atender_conexion(clasificador, r, w), host, puerto)
+
+    print(f"✅ Servidor escuchando en http://{host}:{puerto} (POST /clasificar, GET /metricas). Ctrl+C para detener.")
+    emitir_blip("info")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        tarea_lotes.cancel()
+
+# -------------------------------
+# MAIN (bloque principal del programa)
+# -------------------------------
+if __name__ == "__main__":
+    try:
+        directorio_estado = formatear_ruta(input("📂 Ingresa la carpeta con el estado del script 03 (3_Centroides.npy): ")) or "."
+        if not os.path.isdir(directorio_estado):
+            raise FileNotFoundError("❌ La carpeta indicada no existe.")
+        asyncio.run(iniciar_servidor(directorio_estado))
+    except KeyboardInterrupt:
+        print("\n🛑 Servidor detenido.")
+    except Exception as e:
+        emitir_blip("error")
+        print(f"\n🚨 Error inesperado: {e}")
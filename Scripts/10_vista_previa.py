@@ -0,0 +1,221 @@
+# -----------------------------------------------
+# 10_vista_previa.py
+# Vista previa rápida de un dataset nuevo sobre una muestra estratificada (mes de 'published' × temporada comercial)
+# - Ejecuta limpieza (01), embeddings + clusters (03) y keywords (02, 04) solo sobre la muestra
+# - Extrapola tamaños de cluster y frecuencias de keywords al total con intervalos de confianza del 95 %
+# - Opcionalmente compara las estimaciones con una corrida completa para medir el error
+# Uso: Ejecutar sobre el export original (el mismo archivo que recibe 01_limpiar_datos.py)
+# -----------------------------------------------
+
+# Hilos para torch (embeddings de la muestra) y K-Means según PIPELINE_HILOS; antes de importar numpy/pandas
+import presupuesto_hilos
+presupuesto_hilos.configurar_entorno()
+
+import os
+import platform
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import etapas
+
+limpieza = etapas.cargar_etapa("01_limpiar_datos")
+keywords_post = etapas.cargar_etapa("02_extraer_keywords_post")
+agrupamiento = etapas.cargar_etapa("03_agrupar_cluster")
+keywords_cluster = etapas.cargar_etapa("04_extraer_keywords_cluster")
+
+# -------------------------------
+# CONFIGURACIÓN GENERAL
+# -------------------------------
+
+# Tamaño objetivo de la muestra (si el dataset es más chico, se usa completo)
+N_MUESTRA = 2000
+
+# Número de keywords globales que se extrapolan
+TOP_KEYWORDS = 50
+
+# Valor z para intervalos de confianza del 95 %
+Z_95 = 1.96
+
+# Función para emitir sonidos en Windows como retroalimentación al usuario
+def emitir_blip(tipo="info"):
+    if platform.system() == "Windows":
+        import winsound
+        if tipo == "error":
+            winsound.MessageBeep(winsound.MB_ICONHAND)
+        else:
+            winsound.MessageBeep()
+
+# Limpia y normaliza una ruta ingresada por el usuario
+def formatear_ruta(ruta_original):
+    return ruta_original.strip().replace('\\', '/').strip('"').strip("'")
+
+# Define el estrato de cada post a partir del mes de publicación y la temporada comercial
+def asignar_estratos(df):
+    if 'published' not in df.columns:
+        return pd.Series("Desconocido", index=df.index)
+    fechas = pd.to_datetime(df['published'], errors='coerce')
+    mes = fechas.dt.to_period('M').astype(str).where(fechas.notna(), "Desconocido")
+    temporada = fechas.dt.month.map(limpieza.temporadas_dict).fillna("Sin campaña")
+    return mes + " | " + temporada
+
+# Toma una muestra estratificada con asignación proporcional (al menos un post por estrato)
+def muestrear_estratificado(df, estratos, n_muestra=N_MUESTRA, semilla=42):
+    tamanos = estratos.value_counts()
+    asignacion = np.maximum(1, np.round(n_muestra * tamanos / len(df))).astype(int)
+    asignacion = np.minimum(asignacion, tamanos)
+
+    indices = []
+    for estrato, n_h in asignacion.items():
+        filas = estratos.index[estratos == estrato]
+        indices.extend(pd.Series(filas).sample(n=n_h, random_state=semilla).tolist())
+    return df.loc[indices].copy(), tamanos
+
+# Estimador estratificado del total de cada columna de 'valores' (una fila por post de la muestra)
+# total = Σ N_h·ȳ_h ; var = Σ N_h²·(1 − n_h/N_h)·s_h²/n_h
+def estimar_totales(valores, estratos, tamanos_estrato):
+    grupos = valores.groupby(estratos.loc[valores.index])
+    medias = grupos.mean()
+    varianzas = grupos.var(ddof=1).fillna(0)
+    n_h = grupos.size()
+    N_h = tamanos_estrato.reindex(medias.index)
+
+    total = medias.mul(N_h, axis=0).sum()
+    factor = N_h ** 2 * (1 - n_h / N_h) / n_h
+    error_estandar = np.sqrt(varianzas.mul(factor, axis=0).sum())
+
+    return pd.DataFrame({
+        'estimado': total.round(1),
+        'ic95_inferior': (total - Z_95 * error_estandar).clip(lower=0).round(1),
+        'ic95_superior': (total + Z_95 * error_estandar).round(1),
+    })
+
+# Ejecuta limpieza, clusters y keywords sobre la muestra y extrapola al total
+def generar_vista_previa(df_crudo, n_muestra=N_MUESTRA, modelo=None):
+    df_crudo.columns = [col.strip().lower() for col in df_crudo.columns]
+    estratos = asignar_estratos(df_crudo)
+    muestra, tamanos_estrato = muestrear_estratificado(df_crudo, estratos, n_muestra)
+    total_posts = len(df_crudo)
+    print(f"🎯 Muestra de {len(muestra)} posts sobre {total_posts} ({len(tamanos_estrato)} estratos).")
+
+    muestra = limpieza.limpiar_dataframe(muestra)
+    muestra = agrupamiento.normalizar_columnas(muestra)
+    n_clusters = min(agrupamiento.N_CLUSTERS, len(muestra))
+    muestra = agrupamiento.generar_clusters(muestra, n_clusters=n_clusters, modelo=modelo)
+
+    # Tamaños de cluster: total estimado de la indicadora (post pertenece al cluster)
+    indicadoras = pd.get_dummies(muestra['cluster']).astype(float)
+    df_clusters = estimar_totales(indicadoras, estratos, tamanos_estrato)
+    df_clusters['proporcion_estimada'] = (df_clusters['estimado'] / total_posts).round(4)
+    df_clusters = df_clusters.rename_axis('cluster').reset_index()
+
+    # Keywords: total estimado de apariciones de cada keyword del top de la muestra
+    stopwords_es = set(keywords_post.stopwords.words('spanish'))
+    tokenizer = keywords_post.RegexpTokenizer(r'\w+')
+    conteos = [Counter(keywords_post.filtrar_tokens(texto, stopwords_es, tokenizer)) for texto in muestra['post_limpio']]
+    conteo_muestra = Counter()
+    for conteo in conteos:
+        conteo_muestra.update(conteo)
+    top = [palabra for palabra, _ in conteo_muestra.most_common(TOP_KEYWORDS)]
+    matriz_conteos = pd.DataFrame(conteos, index=muestra.index).reindex(columns=top).fillna(0)
+    df_keywords = estimar_totales(matriz_conteos, estratos, tamanos_estrato)
+    df_keywords = df_keywords.rename_axis('keyword').reset_index().sort_values('estimado', ascending=False)
+
+    # Keywords por cluster calculadas directamente sobre la muestra (referencia cualitativa)
+    df_keywords_cluster = keywords_cluster.analizar_frecuencia_por_cluster(muestra)
+
+    return df_clusters, df_keywords, df_keywords_cluster
+
+# Compara la vista previa con una corrida completa (DataFrame con 'post_limpio' y 'cluster')
+# Los números de cluster de dos K-Means distintos no coinciden, por eso los tamaños se comparan ordenados de mayor a menor
+def comparar_con_corrida_completa(df_clusters, df_keywords, df_completo):
+    total = len(df_completo)
+
+    estimados = df_clusters['proporcion_estimada'].sort_values(ascending=False).to_numpy()
+    reales = df_completo['cluster'].value_counts(normalize=True).to_numpy()
+    n = min(len(estimados), len(reales))
+    comparacion_clusters = pd.DataFrame({
+        'rango_tamano': np.arange(1, n + 1),
+        'proporcion_estimada': estimados[:n],
+        'proporcion_real': reales[:n].round(4),
+    })
+    comparacion_clusters['error_absoluto'] = (comparacion_clusters['proporcion_estimada'] - comparacion_clusters['proporcion_real']).abs().round(4)
+
+    stopwords_es = set(keywords_post.stopwords.words('spanish'))
+    tokenizer = keywords_post.RegexpTokenizer(r'\w+')
+    conteo_real = Counter()
+    for texto in df_completo['post_limpio'].fillna(''):
+        conteo_real.update(keywords_post.filtrar_tokens(texto, stopwords_es, tokenizer))
+
+    comparacion_keywords = df_keywords.copy()
+    comparacion_keywords['real'] = comparacion_keywords['keyword'].map(conteo_real).fillna(0)
+    comparacion_keywords['error_relativo'] = ((comparacion_keywords['estimado'] - comparacion_keywords['real']).abs()
+                                              / comparacion_keywords['real'].replace(0, 1)).round(4)
+    comparacion_keywords['dentro_ic95'] = comparacion_keywords['real'].between(
+        comparacion_keywords['ic95_inferior'], comparacion_keywords['ic95_superior'])
+
+    print(f"\n📏 Comparación con la corrida completa ({total} posts):")
+    print(f"   Error absoluto medio en proporción de clusters: {comparacion_clusters['error_absoluto'].mean():.4f}")
+    print(f"   Error relativo medio en keywords: {comparacion_keywords['error_relativo'].mean():.2%}")
+    print(f"   Keywords con valor real dentro del IC 95 %: {comparacion_keywords['dentro_ic95'].mean():.0%}")
+
+    return comparacion_clusters, comparacion_keywords
+
+# Corrida completa de referencia (01 + 03 sobre todas las filas); solo se usa para validar la vista previa
+def ejecutar_corrida_completa(df_crudo, modelo=None):
+    df = limpieza.limpiar_dataframe(df_crudo.copy())
+    df = agrupamiento.normalizar_columnas(df)
+    return agrupamiento.generar_clusters(df, modelo=modelo)
+
+# -------------------------------
+# MAIN (bloque principal del programa)
+# -------------------------------
+if __name__ == "__main__":
+    try:
+        ruta = formatear_ruta(input("📂 Ingresa la ruta del export original (.xlsx): "))
+        df_crudo = pd.read_excel(ruta)
+
+        inicio = time.perf_counter()
+        df_clusters, df_keywords, df_keywords_cluster = generar_vista_previa(df_crudo.copy())
+        print(f"\n⏱️ Vista previa generada en {time.perf_counter() - inicio:.1f} s.")
+
+        print("\n📊 TAMAÑO ESTIMADO DE CLUSTERS (IC 95 %)")
+        print(df_clusters.to_string(index=False))
+        print("\n🔝 KEYWORDS ESTIMADAS (TOP 10)")
+        print(df_keywords.head(10).to_string(index=False))
+
+        hojas = {'Clusters': df_clusters, 'Keywords': df_keywords, 'Keywords_Cluster': df_keywords_cluster}
+
+        print("\n📏 ¿Deseas medir el error frente a una corrida completa?")
+        print("1. No")
+        print("2. Sí, usando un archivo de corrida completa existente (3_Cluster_Indicadores.xlsx)")
+        print("3. Sí, ejecutando ahora la corrida completa (lento)")
+        opcion = input("👉 Elige una opción (1-3): ").strip()
+
+        df_completo = None
+        if opcion == "2":
+            ruta_completa = formatear_ruta(input("📂 Ingresa la ruta de 3_Cluster_Indicadores.xlsx: "))
+            df_completo = agrupamiento.cargar_excel(ruta_completa)
+        elif opcion == "3":
+            df_completo = ejecutar_corrida_completa(df_crudo)
+
+        if df_completo is not None:
+            comparacion_clusters, comparacion_keywords = comparar_con_corrida_completa(df_clusters, df_keywords, df_completo)
+            hojas['Validacion_Clusters'] = comparacion_clusters
+            hojas['Validacion_Keywords'] = comparacion_keywords
+
+        salida = agrupamiento.generar_nombre_unico(os.path.join(os.path.dirname(ruta), "10_Vista_Previa.xlsx"))
+        with pd.ExcelWriter(salida) as writer:
+            for nombre_hoja, df_hoja in hojas.items():
+                df_hoja.to_excel(writer, sheet_name=nombre_hoja, index=False)
+
+        emitir_blip("info")
+        print(f"\n✅ Vista previa exportada en:\n📁 {salida}")
+
+    except Exception as e:
+        emitir_blip("error")
+        print(f"\n🚨 Error inesperado: {e}")
+
+    input("\nPresiona ENTER para salir...")
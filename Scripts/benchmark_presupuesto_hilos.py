@@ -0,0 +1,111 @@
+# -----------------------------------------------
+# benchmark_presupuesto_hilos.py
+# Mide el throughput de varios pipelines corriendo a la vez (embeddings + K-Means)
+# - Sin presupuesto: cada proceso usa la configuración por defecto de torch/OpenMP/BLAS (todos los núcleos)
+# - Con presupuesto: los núcleos se reparten entre los procesos (presupuesto_hilos.py)
+# Uso: Ejecutar directamente; respeta PIPELINE_HILOS como presupuesto total
+# -----------------------------------------------
+
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import etapas
+import presupuesto_hilos
+
+# Vocabulario para generar textos sintéticos parecidos a 'post_limpio'
+VOCABULARIO = """asalto robo delincuentes policia incendio evacuacion bomberos heridos accidente transito camioneta
+choque avenida municipalidad clausura fiscalizacion defensa civil techo desplome restaurante cierre empresa
+denuncia seguridad vigilancia emergencia victimas familia justicia sanciones tragedia lima trujillo arequipa
+sjl callao balacera extorsion criminalidad estructura colapso inspeccion licencia funcionamiento""".split()
+
+# Número de clusters del K-Means de la prueba
+N_CLUSTERS = 5
+
+# Barrera compartida para que todos los procesos midan su carga al mismo tiempo
+_barrera = None
+
+# Genera textos sintéticos reproducibles
+def generar_textos(n_textos, semilla):
+    rng = random.Random(semilla)
+    return [" ".join(rng.choices(VOCABULARIO, k=rng.randint(8, 40))) for _ in range(n_textos)]
+
+# Inicializador de cada proceso: aplica (o quita) el límite de hilos antes de importar numpy/torch
+def preparar_proceso(hilos, barrera):
+    global _barrera
+    _barrera = barrera
+    if hilos is None:
+        for variable in presupuesto_hilos.VARIABLES_HILOS + [presupuesto_hilos.VARIABLE_ENTORNO]:
+            os.environ.pop(variable, None)
+    else:
+        presupuesto_hilos.configurar_entorno(hilos)
+
+# Carga de un pipeline: embeddings + K-Means sobre textos sintéticos (se excluye la carga del modelo)
+def ejecutar_carga(n_textos, semilla):
+    agrupamiento = etapas.cargar_etapa("03_agrupar_cluster")
+    modelo = agrupamiento.cargar_modelo()
+    textos = generar_textos(n_textos, semilla)
+
+    _barrera.wait()
+    inicio = time.perf_counter()
+    embeddings = modelo.encode(textos, show_progress_bar=False)
+    segundos_encode = time.perf_counter() - inicio
+
+    inicio_kmeans = time.perf_counter()
+    agrupamiento.KMeans(n_clusters=N_CLUSTERS, random_state=42, n_init=10).fit(embeddings)
+    segundos_kmeans = time.perf_counter() - inicio_kmeans
+
+    return segundos_encode, segundos_kmeans, time.perf_counter() - inicio
+
+# Ejecuta 'n_pipelines' cargas simultáneas con 'hilos' por proceso (None = sin límite)
+def ejecutar_escenario(n_pipelines, n_textos, hilos):
+    contexto = multiprocessing.get_context("spawn")
+    barrera = contexto.Barrier(n_pipelines)
+    with ProcessPoolExecutor(max_workers=n_pipelines, mp_context=contexto,
+                             initializer=preparar_proceso, initargs=(hilos, barrera)) as pool:
+        futuros = [pool.submit(ejecutar_carga, n_textos, semilla) for semilla in range(n_pipelines)]
+        resultados = [futuro.result() for futuro in futuros]
+
+    segundos_pared = max(total for _, _, total in resultados)
+    return {
+        'hilos_por_proceso': hilos if hilos is not None else "sin límite",
+        'encode_s_promedio': round(sum(r[0] for r in resultados) / n_pipelines, 2),
+        'kmeans_s_promedio': round(sum(r[1] for r in resultados) / n_pipelines, 2),
+        'segundos_pared': round(segundos_pared, 2),
+        'textos_por_segundo': round(n_pipelines * n_textos / segundos_pared, 1),
+    }
+
+# -------------------------------
+# MAIN (bloque principal del programa)
+# -------------------------------
+if __name__ == "__main__":
+    total = presupuesto_hilos.obtener_presupuesto()
+
+    n_pipelines = input("⚙️ ¿Cuántos pipelines simultáneos? (ENTER = 2): ").strip()
+    n_pipelines = int(n_pipelines) if n_pipelines.isdigit() and int(n_pipelines) > 0 else 2
+    n_textos = input("📝 ¿Cuántos textos por pipeline? (ENTER = 2000): ").strip()
+    n_textos = int(n_textos) if n_textos.isdigit() and int(n_textos) > 0 else 2000
+
+    print(f"\n🧪 {n_pipelines} pipelines × {n_textos} textos, presupuesto total de {total} hilos.\n")
+    escenarios = [
+        ("Sin presupuesto (sobresuscripción)", None),
+        ("Con presupuesto repartido", presupuesto_hilos.presupuesto_por_trabajador(n_pipelines, total)),
+    ]
+
+    resultados = []
+    for nombre, hilos in escenarios:
+        print(f"⏱️ {nombre}...")
+        fila = ejecutar_escenario(n_pipelines, n_textos, hilos)
+        fila['escenario'] = nombre
+        resultados.append(fila)
+
+    print("\n📊 RESULTADOS")
+    for fila in resultados:
+        print(f"{fila['escenario']:>36}: {fila['textos_por_segundo']:>8} textos/s "
+              f"(hilos/proceso: {fila['hilos_por_proceso']}, encode {fila['encode_s_promedio']} s, "
+              f"K-Means {fila['kmeans_s_promedio']} s, pared {fila['segundos_pared']} s)")
+
+    mejora = resultados[1]['textos_por_segundo'] / max(resultados[0]['textos_por_segundo'], 1e-9)
+    print(f"\n🚀 Throughput con presupuesto: x{mejora:.2f} respecto a la sobresuscripción.")
@@ -0,0 +1,165 @@
+# -----------------------------------------------
+# corpus_tokenizado.py
+# Corpus tokenizado compartido entre etapas: vocabulario internado + ids de token int32 en formato CSR
+# Uso: lo genera opcionalmente 01_limpiar_datos.py junto a 1_Dataset_Limpio.xlsx (mismo orden de filas).
+#      02, 04, 04_2 y 07 lo usan para contar keywords directamente sobre ids, sin volver a tokenizar 'post_limpio'.
+#      Una huella de los textos tokenizados evita usar el corpus con un dataset distinto
+#      Los arreglos se abren como memory-map, sin cargarlos completos en memoria
+# -----------------------------------------------
+
+import hashlib
+import os
+import re
+from array import array
+
+import numpy as np
+import scipy.sparse as sp
+
+# Archivos del corpus (se guardan en la misma carpeta que el dataset limpio)
+ARCHIVO_VOCABULARIO = "1_Corpus_Vocabulario.txt"
+ARCHIVO_OFFSETS = "1_Corpus_Offsets.npy"
+ARCHIVO_TOKENS = "1_Corpus_Tokens.npy"
+ARCHIVO_HUELLA = "1_Corpus_Huella.txt"
+
+# Mismo criterio de tokenización que RegexpTokenizer(r'\w+') sobre el texto en minúsculas
+PATRON_TOKENS = re.compile(r'\w+')
+
+
+class CorpusTokenizado:
+    """
+    Posts como secuencias de ids de token: los tokens del post i son tokens[offsets[i]:offsets[i + 1]].
+    Cada palabra distinta se guarda una sola vez en 'vocabulario' (el id es su posición en la lista).
+    """
+
+    def __init__(self, vocabulario, offsets, tokens, huella=None):
+        self.vocabulario = vocabulario
+        self.offsets = offsets
+        self.tokens = tokens
+        self.huella = huella
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    # Ids de token del post 'fila'
+    def tokens_fila(self, fila):
+        return self.tokens[self.offsets[fila]:self.offsets[fila + 1]]
+
+    # Máscara por id de vocabulario: True si la palabra cuenta como keyword (no es stopword y tiene más de 2 letras)
+    def mascara_keywords(self, stopwords_es):
+        return np.fromiter((len(p) > 2 and p not in stopwords_es for p in self.vocabulario),
+                           dtype=bool, count=len(self.vocabulario))
+
+    # Fila (post) a la que pertenece cada token del arreglo 'tokens'
+    def filas_tokens(self):
+        return np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.offsets))
+
+# Huella (SHA-1) de los textos en orden: identifica el dataset del que se generó el corpus
+def huella_textos(textos):
+    sha = hashlib.sha1()
+    for texto in textos:
+        sha.update(str(texto).encode("utf-8"))
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+# Tokeniza los textos una sola vez, internando cada palabra en el vocabulario
+# Los ids se asignan por orden de primera aparición
+def tokenizar(textos):
+    textos = list(textos)
+    ids_vocabulario = {}
+    offsets = array('q', [0])
+    tokens = array('i')
+
+    for texto in textos:
+        palabras = PATRON_TOKENS.findall(str(texto).lower())
+        tokens.extend([ids_vocabulario.setdefault(p, len(ids_vocabulario)) for p in palabras])
+        offsets.append(len(tokens))
+
+    return CorpusTokenizado(list(ids_vocabulario), np.frombuffer(offsets, dtype=np.int64),
+                            np.frombuffer(tokens, dtype=np.int32), huella_textos(textos))
+
+# Guarda el corpus en 'directorio' (vocabulario en texto, una palabra por línea; offsets e ids en .npy)
+def guardar_corpus(corpus, directorio):
+    with open(os.path.join(directorio, ARCHIVO_VOCABULARIO), "w", encoding="utf-8") as f:
+        f.write("\n".join(corpus.vocabulario))
+    np.save(os.path.join(directorio, ARCHIVO_OFFSETS), np.asarray(corpus.offsets, dtype=np.int64))
+    np.save(os.path.join(directorio, ARCHIVO_TOKENS), np.asarray(corpus.tokens, dtype=np.int32))
+    with open(os.path.join(directorio, ARCHIVO_HUELLA), "w", encoding="utf-8") as f:
+        f.write(corpus.huella or "")
+
+# Indica si 'directorio' contiene un corpus tokenizado
+def existe_corpus(directorio):
+    return all(os.path.exists(os.path.join(directorio, nombre))
+               for nombre in (ARCHIVO_VOCABULARIO, ARCHIVO_OFFSETS, ARCHIVO_TOKENS, ARCHIVO_HUELLA))
+
+# Carga el corpus de 'directorio' con los arreglos como memory-map (solo lectura)
+def cargar_corpus(directorio):
+    with open(os.path.join(directorio, ARCHIVO_VOCABULARIO), encoding="utf-8") as f:
+        contenido = f.read()
+    vocabulario = contenido.split("\n") if contenido else []
+    offsets = np.load(os.path.join(directorio, ARCHIVO_OFFSETS), mmap_mode="r")
+    tokens = np.load(os.path.join(directorio, ARCHIVO_TOKENS), mmap_mode="r")
+    with open(os.path.join(directorio, ARCHIVO_HUELLA), encoding="utf-8") as f:
+        huella = f.read().strip()
+    return CorpusTokenizado(vocabulario, offsets, tokens, huella)
+
+# Carga el corpus de 'directorio' solo si se generó a partir de exactamente estos 'textos' (None en otro caso)
+# El corpus se sobrescribe en cada ejecución de 01, así que se compara la huella y no solo el número de posts
+def cargar_corpus_alineado(directorio, textos):
+    if not existe_corpus(directorio):
+        return None
+    corpus = cargar_corpus(directorio)
+    if corpus.huella != huella_textos(textos):
+        print("⚠️ El corpus tokenizado de la carpeta corresponde a otro dataset; se tokenizará de nuevo 'post_limpio'.")
+        return None
+    return corpus
+
+# Matriz documento-término (CSR) directamente desde los ids, solo con las columnas de 'mascara'
+# Las columnas quedan en orden alfabético, igual que en CountVectorizer; devuelve (matriz, vocabulario)
+def matriz_terminos(corpus, mascara, dtype=np.float32):
+    n_vocabulario = len(corpus.vocabulario)
+    # Copias en memoria: sum_duplicates ordena los índices en su lugar y el memory-map es de solo lectura
+    tokens = np.array(corpus.tokens)
+    matriz = sp.csr_matrix((np.ones(len(tokens), dtype=dtype), tokens, np.array(corpus.offsets)),
+                           shape=(len(corpus), n_vocabulario))
+    matriz.sum_duplicates()
+
+    vocabulario = np.array(corpus.vocabulario, dtype=str)
+    columnas = np.flatnonzero(mascara)
+    columnas = columnas[np.argsort(vocabulario[columnas], kind="stable")]
+    return matriz[:, columnas].tocsr(), vocabulario[columnas]
+
+# Frecuencia de cada keyword, total (vector) o por grupo (matriz grupos x vocabulario)
+# 'grupos' es un código entero por post (0 .. n_grupos - 1, o -1 para omitir el post), por ejemplo el cluster de cada fila
+# También devuelve la posición de la primera aparición de cada keyword (en el grupo), para desempatar como Counter
+def frecuencias_keywords(corpus, mascara, grupos=None, n_grupos=1):
+    tokens = np.asarray(corpus.tokens)
+    validos = mascara[tokens]
+    n_vocabulario = len(corpus.vocabulario)
+
+    if grupos is None:
+        claves = tokens[validos].astype(np.int64)
+    else:
+        grupo_token = np.asarray(grupos, dtype=np.int64)[corpus.filas_tokens()]
+        validos &= grupo_token >= 0
+        claves = grupo_token[validos] * n_vocabulario + tokens[validos]
+
+    conteos = np.bincount(claves, minlength=n_grupos * n_vocabulario)
+    primera_aparicion = np.full(n_grupos * n_vocabulario, np.iinfo(np.int64).max, dtype=np.int64)
+    presentes, posiciones = np.unique(claves, return_index=True)
+    primera_aparicion[presentes] = posiciones
+
+    if grupos is None:
+        return conteos, primera_aparicion
+    return conteos.reshape(n_grupos, n_vocabulario), primera_aparicion.reshape(n_grupos, n_vocabulario)
+
+# Ids de las 'n' keywords más frecuentes (orden descendente, sin conteos en cero)
+# Los empates se resuelven por primera aparición, igual que Counter.most_common sobre los textos
+def top_ids(conteos, primera_aparicion, n):
+    n = min(n, int(np.count_nonzero(conteos)))
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    # Candidatos: todos los ids con conteo >= al n-ésimo mayor (incluye los empatados en el corte)
+    umbral = np.partition(conteos, len(conteos) - n)[len(conteos) - n]
+    candidatos = np.flatnonzero(conteos >= umbral)
+    orden = np.lexsort((primera_aparicion[candidatos], -conteos[candidatos]))
+    return candidatos[orden[:n]]
@@ -0,0 +1,13 @@
+# -----------------------------------------------
+# etapas.py
+# Carga de los scripts numerados (01_limpiar_datos.py, 03_agrupar_cluster.py, ...) como módulos
+# - Sus nombres empiezan con dígitos, así que no se pueden importar con 'import'; se cargan con importlib
+# - Cada etapa se ejecuta una sola vez por proceso: importlib reutiliza el módulo ya cargado
+# Uso: etapas.cargar_etapa("01_limpiar_datos") desde los scripts de la carpeta Scripts
+# -----------------------------------------------
+
+import importlib
+
+# Módulo del script numerado 'nombre' (sin la extensión .py)
+def cargar_etapa(nombre):
+    return importlib.import_module(nombre)
@@ -0,0 +1,87 @@
+# -----------------------------------------------
+# presupuesto_hilos.py
+# Presupuesto global de hilos de CPU para torch, OpenMP/BLAS y scikit-learn
+# Uso: se importa al inicio de los scripts que calculan con numpy/torch/scikit-learn (antes de importarlos).
+#      El presupuesto se define con la variable de entorno PIPELINE_HILOS; si no está definida,
+#      cada librería usa su configuración por defecto (los modos en paralelo reparten todos los núcleos)
+#      Ejemplo (Windows):  set PIPELINE_HILOS=8   |   (Linux/Mac):  export PIPELINE_HILOS=8
+# -----------------------------------------------
+
+import os
+import sys
+
+# Variable de entorno con el número total de hilos que puede usar el pipeline
+VARIABLE_ENTORNO = "PIPELINE_HILOS"
+
+# Variables que leen OpenMP y las distintas implementaciones de BLAS al cargarse
+VARIABLES_HILOS = [
+    "OMP_NUM_THREADS",         # OpenMP (K-Means de scikit-learn, torch)
+    "OPENBLAS_NUM_THREADS",    # OpenBLAS (numpy)
+    "MKL_NUM_THREADS",         # Intel MKL (numpy / torch)
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",  # Accelerate (macOS)
+    "NUMEXPR_NUM_THREADS",
+]
+
+# Porción del presupuesto asignada explícitamente a este proceso (por ejemplo, el proceso principal de 07)
+# PIPELINE_HILOS no se modifica: sigue indicando el presupuesto total
+_hilos_proceso = None
+
+# Devuelve el presupuesto total de hilos (variable de entorno o todos los núcleos disponibles)
+def obtener_presupuesto():
+    valor = os.environ.get(VARIABLE_ENTORNO, "").strip()
+    if valor.isdigit() and int(valor) > 0:
+        return int(valor)
+    return os.cpu_count() or 1
+
+# Reparte el presupuesto entre 'n_trabajadores' procesos o hilos (al menos 1 hilo cada uno)
+def presupuesto_por_trabajador(n_trabajadores, total=None):
+    total = obtener_presupuesto() if total is None else total
+    return max(1, total // max(1, n_trabajadores))
+
+# Presupuesto explícito: el valor recibido, la porción asignada al proceso o la variable de entorno
+# (None si no se definió ninguno)
+def _presupuesto_definido(hilos):
+    if hilos is not None:
+        return hilos
+    if _hilos_proceso is not None:
+        return _hilos_proceso
+    if os.environ.get(VARIABLE_ENTORNO, "").strip().isdigit():
+        return obtener_presupuesto()
+    return None
+
+# Fija las variables de entorno de OpenMP/BLAS; solo surte efecto si se llama antes de importar numpy/torch
+# Un valor explícito queda como porción de este proceso: las llamadas posteriores sin argumento la respetan
+def configurar_entorno(hilos=None):
+    global _hilos_proceso
+    if hilos is not None:
+        _hilos_proceso = hilos
+    hilos = _presupuesto_definido(hilos)
+    if hilos is None:
+        return None
+    for variable in VARIABLES_HILOS:
+        os.environ[variable] = str(hilos)
+    return hilos
+
+# Aplica el límite en tiempo de ejecución a las librerías ya cargadas (torch y los pools de threadpoolctl)
+def limitar_librerias(hilos=None):
+    hilos = _presupuesto_definido(hilos)
+    if hilos is None:
+        return None
+
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(hilos)
+
+    # threadpoolctl viene con scikit-learn y controla OpenMP/BLAS ya cargados
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=hilos)
+    except ImportError:
+        pass
+
+    return hilos
+
+# Inicializador para procesos de un pool: aplica la porción del presupuesto que le corresponde a cada uno
+def inicializar_trabajador(hilos):
+    configurar_entorno(hilos)
+    limitar_librerias(hilos)